@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Invoice
+from . import outbox
+from .models import User, Invoice, OutboxEmail
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -23,3 +24,16 @@ class InvoiceAdmin(admin.ModelAdmin):
     readonly_fields = ['invoice_number', 'balance_due', 'created_at', 'updated_at']
 
 admin.site.register(Invoice, InvoiceAdmin)
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'to', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['to', 'subject']
+    readonly_fields = ['claimed_by', 'claimed_until', 'last_error', 'created_at', 'sent_at']
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected emails')
+    def requeue(self, request, queryset):
+        count = outbox.requeue(queryset)
+        self.message_user(request, f'{count} emails queued for another round of attempts')
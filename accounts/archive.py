@@ -0,0 +1,130 @@
+"""
+Archive tier for completed, paid tasks.
+
+``archive_completed_tasks`` moves tasks that were completed and paid more
+than N months ago, with their invoices and attachment metadata, from the
+hot Task/Invoice/TaskAttachment tables into ArchivedTask, ArchivedInvoice
+and ArchivedTaskAttachment. Lists, searches and dashboard counters then
+only walk recent rows. Archived rows keep their ids, codes and timestamps;
+uploaded files stay where they are.
+
+The move deletes with plain SQL, skipping the delete signals, so the
+DailyMetrics rollup keeps the archived history. The search rows are
+removed here instead.
+
+Reports over historical ranges add the archive when ``reaches`` says the
+range starts before ``horizon()``, the latest date on any archived row, so
+recent windows never touch it. Archive figures only change when rows are
+archived, so ``cached`` keeps them until the next run.
+"""
+import time
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from . import dashboard_cache, invoice_search, list_counts, task_search
+from .models import ArchivedInvoice, ArchivedTask, ArchivedTaskAttachment, Invoice, Task, TaskAttachment
+
+VERSION_KEY = 'archive:version'
+CACHE_TIMEOUT = 24 * 60 * 60  # seconds
+
+# (hot model, archive model, column holding the task id), parents first
+TABLES = [
+    (Task, ArchivedTask, 'id'),
+    (Invoice, ArchivedInvoice, 'task_id'),
+    (TaskAttachment, ArchivedTaskAttachment, 'task_id'),
+]
+
+
+def get_version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Forget the cached horizon and archive figures"""
+    dashboard_cache.get_cache().set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate(sender=None, **kwargs):
+    """post_delete receiver for archive models (rows go when their client is deleted)"""
+    transaction.on_commit(bump_version)
+
+
+def cached(name, compute, *params):
+    """``compute()``, cached until the archive next changes"""
+    cache = dashboard_cache.get_cache()
+    key = ':'.join(['archive', str(get_version(cache)), name, *[str(param) for param in params]])
+    entry = cache.get(key)
+    if entry is None:
+        # Wrapped so a None result is cached too
+        entry = (compute(),)
+        cache.set(key, entry, CACHE_TIMEOUT)
+    return entry[0]
+
+
+def horizon():
+    """Latest created_at, deadline or payment_date on an archived row; None while the archive is empty"""
+    def compute():
+        latest = [
+            *ArchivedTask.objects.aggregate(Max('created_at'), Max('deadline')).values(),
+            *ArchivedInvoice.objects.aggregate(Max('payment_date')).values(),
+        ]
+        latest = [value for value in latest if value is not None]
+        return max(latest) if latest else None
+    return cached('horizon', compute)
+
+
+def reaches(since):
+    """Whether a report over rows dated ``since`` or later needs the archive"""
+    latest = horizon()
+    return latest is not None and since <= latest
+
+
+def archivable(cutoff):
+    """Completed tasks with a fully paid invoice, neither changed since ``cutoff``"""
+    return Task.objects.filter(
+        status='Completed',
+        updated_at__lt=cutoff,
+        invoice__payment_status='Completed',
+        invoice__updated_at__lt=cutoff,
+    )
+
+
+def _delete(model, column, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    table, column = connection.ops.quote_name(model._meta.db_table), connection.ops.quote_name(column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids)
+
+
+def archive_batch(cutoff, batch_size=500):
+    """Move up to ``batch_size`` archivable tasks in one transaction; returns how many moved"""
+    with transaction.atomic():
+        ids = list(
+            archivable(cutoff).select_for_update().order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        for model, archive_model, task_column in TABLES:
+            fields = [field.attname for field in archive_model._meta.concrete_fields if field.name != 'archived_at']
+            rows = model.objects.filter(**{f'{task_column}__in': ids}).values(*fields)
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+
+        task_search.INDEX.remove_many(ids)
+        invoice_search.INDEX.remove_many(
+            list(Invoice.objects.filter(task_id__in=ids).values_list('id', flat=True))
+        )
+        # Children first: the foreign keys do not cascade in the database
+        for model, _, task_column in reversed(TABLES):
+            _delete(model, task_column, ids)
+
+        def archived():
+            bump_version()
+            list_counts.bump_versions(['tasks', 'invoices'])
+            dashboard_cache.bump_version()
+        transaction.on_commit(archived)
+    return len(ids)
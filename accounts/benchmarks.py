@@ -0,0 +1,201 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks seed their data inside a transaction that is always rolled back,
+so they can be pointed at a working database without leaving rows behind.
+Those that must commit (concurrency tests) run on a ``scratch_database``.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import User, Task, Invoice
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction that is rolled back on exit"""
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def scratch_database(using=DEFAULT_DB_ALIAS):
+    """Point ``using`` at a temporary copy of its SQLite database for the block
+
+    Everything the block commits, including sequence values and journal mode
+    changes, goes to the copy, which is deleted on exit. Connections opened
+    in the block, by threads and forked processes too, use the copy.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError('Only SQLite databases can be copied')
+    source = connection.settings_dict['NAME']
+    connection.close()
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, 'scratch.sqlite3')
+        # The backup API copies a consistent snapshot, WAL contents included
+        with sqlite3.connect(source) as original, sqlite3.connect(copy) as target:
+            original.backup(target)
+        original.close()
+        target.close()
+        # Shared with every connection created for the alias from now on
+        connection.settings_dict['NAME'] = copy
+        try:
+            yield copy
+        finally:
+            connections.close_all()
+            connection.settings_dict['NAME'] = source
+
+
+@contextmanager
+def timed(results, label):
+    """Store the wall time of the block in ``results[label]`` (milliseconds)"""
+    start = time.perf_counter()
+    yield
+    results[label] = (time.perf_counter() - start) * 1000
+
+
+def best_time(queryset, repeat=5):
+    """Fastest of ``repeat`` runs of ``queryset`` in milliseconds
+
+    Slices and grouped queries are read in full, plain filters are counted.
+    """
+    best = None
+    for _ in range(repeat):
+        query = queryset._chain()
+        start = time.perf_counter()
+        if query.query.is_sliced or query.query.group_by:
+            len(list(query))
+        else:
+            query.count()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def best_call_time(function, repeat=5):
+    """Fastest of ``repeat`` calls of ``function`` in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def best_page_time(queryset, repeat=3, per_page=10):
+    """Fastest of ``repeat`` paginated list loads in milliseconds: the total count plus the first page
+
+    Returns (milliseconds, total count).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        page = Paginator(queryset._chain(), per_page).get_page(1)
+        list(page)
+        count = page.paginator.count
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def get_bench_user(username, role):
+    user, created = User.objects.get_or_create(
+        username=username,
+        defaults={'role': role, 'first_name': 'Bench', 'last_name': role.title()},
+    )
+    return user
+
+
+def _task_batches(count, days, batch_size, seed, experts):
+    """Insert ``count`` tasks ``batch_size`` at a time, yielding each inserted batch"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    client = get_bench_user('bench_client', 'client')
+    admin = get_bench_user('bench_admin', 'admin')
+    experts = [get_bench_user(f'bench_expert_{i}', 'expert') for i in range(experts)]
+    statuses = [code for code, label in Task.STATUS_CHOICES]
+    currencies = [code for code, label in Task.CURRENCY_CHOICES]
+
+    for offset in range(0, count, batch_size):
+        tasks = []
+        for i in range(offset, min(offset + batch_size, count)):
+            created_at = now - timedelta(days=rng.randint(0, days), minutes=rng.randint(0, 1439))
+            tasks.append(Task(
+                task_code=f'BENCH{i}',
+                client=client,
+                module_code=f'M{rng.randint(100, 999)}',
+                module_name=f'Benchmark module {rng.randint(1, 5000)}',
+                word_count=rng.randint(500, 5000),
+                quoted_price=Decimal(rng.randint(50, 2000)),
+                currency=rng.choice(currencies),
+                deadline=created_at + timedelta(days=rng.randint(1, 30)),
+                allocation=rng.choice(experts),
+                status=rng.choice(statuses),
+                created_by=admin,
+            ))
+        yield Task.objects.bulk_create(tasks)
+
+    # auto_now_add overwrites created_at on insert, so derive it from the deadline
+    Task.objects.filter(task_code__startswith='BENCH').update(
+        created_at=F('deadline') - timedelta(days=7),
+    )
+
+
+def seed_tasks(count, days=365, batch_size=5000, seed=42, experts=10):
+    """Bulk insert ``count`` tasks spread over the last ``days`` days, allocated across ``experts`` experts"""
+    for batch in _task_batches(count, days, batch_size, seed, experts):
+        pass
+    return list(Task.objects.filter(task_code__startswith='BENCH').order_by('id'))
+
+
+def seed_invoices(count, days=365, batch_size=5000, seed=42, experts=10):
+    """Bulk insert ``count`` tasks with one invoice each
+
+    Rows are generated and inserted a batch at a time, so millions of rows
+    can be seeded without holding them all in memory.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    for tasks in _task_batches(count, days, batch_size, seed, experts):
+        invoices = []
+        for task in tasks:
+            amount_due = task.quoted_price
+            status = rng.choice(['Pending', 'Partial', 'Completed', 'Completed'])
+            if status == 'Completed':
+                amount_paid = amount_due
+            elif status == 'Partial':
+                amount_paid = (amount_due / 2).quantize(Decimal('0.01'))
+            else:
+                amount_paid = Decimal('0')
+            invoices.append(Invoice(
+                task=task,
+                invoice_number=task.task_code,
+                amount_due=amount_due,
+                amount_paid=amount_paid,
+                currency=task.currency,
+                payment_status=status,
+                payment_date=now - timedelta(days=rng.randint(0, days)) if amount_paid else None,
+            ))
+        Invoice.objects.bulk_create(invoices)
+    return count
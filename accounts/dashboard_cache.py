@@ -0,0 +1,95 @@
+"""
+Versioned cache of computed dashboard contexts.
+
+Entries are keyed by role, dashboard parameters, date and a global version.
+Saving or deleting a Task, Invoice, TaskAttachment or ExpertPayRate replaces
+the version (see accounts/signals.py), which orphans every cached dashboard
+at once; orphaned entries simply expire. Changes the signals do not see --
+new users, refreshed exchange rates -- show up once the cache timeout runs
+out.
+
+The ``dashboard`` cache alias is used when configured, else ``default``.
+"""
+import time
+
+from django.core.cache import InvalidCacheBackendError, caches
+from django.db import transaction
+from django.utils import timezone
+
+from .dates import business_today
+
+VERSION_KEY = 'dashboard:version'
+STATS_KEYS = {
+    'hits': 'dashboard:stats:hits',
+    'misses': 'dashboard:stats:misses',
+}
+
+
+def get_cache():
+    try:
+        return caches['dashboard']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def get_version(cache=None):
+    cache = cache or get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A fresh value rather than 1, so an evicted version key can never
+        # bring back entries cached under an old version
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Invalidate every cached dashboard"""
+    get_cache().set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate(sender=None, **kwargs):
+    """post_save/post_delete receiver: drop cached dashboards once the write commits"""
+    transaction.on_commit(bump_version)
+
+
+def _count(name):
+    cache = get_cache()
+    key = STATS_KEYS[name]
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """Hit and miss counters, shared by every process using the cache"""
+    cache = get_cache()
+    counts = {name: cache.get(key) or 0 for name, key in STATS_KEYS.items()}
+    lookups = counts['hits'] + counts['misses']
+    counts['hit_rate'] = counts['hits'] / lookups * 100 if lookups else 0
+    return counts
+
+
+def get_or_compute(role, params, compute):
+    """Return the cached ``{'context': ..., 'computed_at': ...}`` entry for a dashboard
+
+    ``compute()`` builds the context on a miss. It must return picklable
+    values, so evaluate querysets into lists first.
+    """
+    cache = get_cache()
+    key = ':'.join([
+        'dashboard', role, str(get_version(cache)), business_today().isoformat(),
+        *[str(param) for param in params],
+    ])
+    entry = cache.get(key)
+    if entry is not None:
+        _count('hits')
+        return entry
+
+    _count('misses')
+    entry = {'context': compute(), 'computed_at': timezone.now()}
+    cache.set(key, entry)
+    return entry
@@ -0,0 +1,139 @@
+"""
+Aggregate queries behind the admin dashboard.
+
+Each function computes a group of dashboard figures in the database with a
+fixed number of queries, independent of how many rows the tables hold.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, ExpressionWrapper, F, Q, Sum
+
+from . import archive, dates, fx
+from .models import ArchivedInvoice, ArchivedTask, User, Task, Invoice
+
+CURRENCY_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£', 'INR': '₹'}
+
+
+def task_counters(today):
+    """Word and task counters for the dashboard cards, in one aggregate query"""
+    ongoing = Q(status='InProgress')
+    due_tomorrow = dates.on_day('deadline', today + timedelta(days=1))
+    this_month = dates.in_range('created_at', today.replace(day=1), today)
+    totals = Task.objects.aggregate(
+        total_words_ongoing=Sum('word_count', filter=ongoing),
+        ongoing_tasks_count=Count('id', filter=ongoing),
+        total_words_task_due=Sum('word_count', filter=due_tomorrow),
+        tomorrow_tasks_count=Count('id', filter=due_tomorrow),
+        total_words_this_month=Sum('word_count', filter=this_month),
+        this_month_tasks_count=Count('id', filter=this_month),
+        total_tasks=Count('id'),
+        pending_tasks=Count('id', filter=Q(status='Pending')),
+        completed_tasks=Count('id', filter=Q(status='Completed')),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    # Archived tasks are all completed, and too old for the other counters
+    archived = archive.cached('task_count', ArchivedTask.objects.count)
+    totals['total_tasks'] += archived
+    totals['completed_tasks'] += archived
+    return totals
+
+
+def user_counters():
+    """User totals by role, in one aggregate query"""
+    return User.objects.aggregate(
+        total_users=Count('id'),
+        total_clients=Count('id', filter=Q(role='client')),
+        total_experts=Count('id', filter=Q(role='expert')),
+    )
+
+
+def revenue_totals(today, rates=None):
+    """Payment received/pending totals and the per-currency breakdown
+
+    Runs a single query grouped by currency and payment status. Received
+    amounts convert at the rate of their payment date, outstanding balances
+    at the current rate. Archived invoices add their own groups, cached
+    until the next archive run.
+    """
+    rates = rates or fx.get_rates()
+    balance_inr = ExpressionWrapper(
+        (F('amount_due') - F('amount_paid')) * F('current_rate'),
+        output_field=fx.AMOUNT_FIELD,
+    )
+    is_open = Q(amount_due__gt=F('amount_paid')) & ~Q(payment_status='Completed')
+    paid_today = dates.on_day('payment_date', today) & Q(payment_status='Completed')
+
+    def grouped(invoices):
+        return fx.with_paid_inr_at_payment_date(invoices, rates).annotate(
+            current_rate=fx.rate_case(rates),
+        ).values('currency', 'payment_status').annotate(
+            invoice_count=Count('id'),
+            total_paid=Sum('amount_paid'),
+            total_due=Sum('amount_due'),
+            paid_inr=Sum('amount_paid_inr', filter=Q(amount_paid__gt=0)),
+            completed_inr=Sum('amount_paid_inr', filter=Q(amount_paid__gt=0, amount_paid__gte=F('amount_due'))),
+            pending_inr=Sum(balance_inr, filter=is_open),
+            today_inr=Sum('amount_paid_inr', filter=paid_today),
+            today_count=Count('id', filter=paid_today),
+        ).order_by()
+
+    rows = [
+        *grouped(Invoice.objects.all()),
+        *archive.cached('revenue_rows', lambda: list(grouped(ArchivedInvoice.objects.all())), today),
+    ]
+
+    totals = {
+        'total_payments_today': 0.0,
+        'today_payments_count': 0,
+        'total_payment_received': 0.0,
+        'completed_payments_inr': 0.0,
+        'partial_payments_inr': 0.0,
+        'total_payment_pending': 0.0,
+        'received_invoices_count': 0,
+        'pending_invoices_count': 0,
+    }
+    by_currency = {}
+    for row in rows:
+        totals['total_payments_today'] += float(row['today_inr'] or 0)
+        totals['today_payments_count'] += row['today_count']
+        totals['total_payment_received'] += float(row['paid_inr'] or 0)
+        totals['completed_payments_inr'] += float(row['completed_inr'] or 0)
+        totals['total_payment_pending'] += float(row['pending_inr'] or 0)
+        if row['payment_status'] == 'Completed':
+            totals['received_invoices_count'] += row['invoice_count']
+        else:
+            totals['pending_invoices_count'] += row['invoice_count']
+
+        currency = by_currency.setdefault(row['currency'], {
+            'total_paid': 0.0, 'total_due': 0.0, 'completed_count': 0, 'pending_count': 0,
+        })
+        currency['total_paid'] += float(row['total_paid'] or 0)
+        currency['total_due'] += float(row['total_due'] or 0)
+        if row['payment_status'] == 'Completed':
+            currency['completed_count'] += row['invoice_count']
+        else:
+            currency['pending_count'] += row['invoice_count']
+    totals['partial_payments_inr'] = totals['total_payment_received'] - totals['completed_payments_inr']
+
+    currency_breakdown = {}
+    for currency_code, currency_name in Invoice.CURRENCY_CHOICES:
+        data = by_currency.get(currency_code)
+        if not data or (data['total_paid'] <= 0 and data['total_due'] <= 0):
+            continue
+        exchange_rate = rates.get(currency_code, 1.0)
+        pending_amount = data['total_due'] - data['total_paid']
+        currency_breakdown[currency_code] = {
+            'currency_name': currency_name,
+            'symbol': CURRENCY_SYMBOLS.get(currency_code, '₹'),
+            'total_paid': data['total_paid'],
+            'total_due': data['total_due'],
+            'total_paid_inr': data['total_paid'] * exchange_rate,
+            'total_due_inr': data['total_due'] * exchange_rate,
+            'pending_amount': pending_amount,
+            'pending_amount_inr': pending_amount * exchange_rate,
+            'completed_count': data['completed_count'],
+            'pending_count': data['pending_count'],
+            'payment_percentage': (data['total_paid'] / data['total_due'] * 100) if data['total_due'] > 0 else 0,
+        }
+    totals['currency_breakdown'] = currency_breakdown
+    return totals
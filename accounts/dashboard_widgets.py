@@ -0,0 +1,170 @@
+"""
+Independently loadable sections of the admin dashboard.
+
+The admin dashboard page is a shell; each widget is fetched from its own
+JSON endpoint, so a slow widget (anything that needs FX rates, say) does
+not hold up the rest. A widget computes a context dict, which is cached per
+role through accounts.dashboard_cache. The payload has the section's HTML,
+rendered from ``templates/accounts/dashboard_widgets/<name>.html``, and any
+raw data the page script needs, such as chart series.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Count, ExpressionWrapper, F, Sum
+from django.template.loader import render_to_string
+
+from . import dashboard_cache, dashboard_metrics, dates, fx, rollups
+from .models import Task, Invoice
+
+# Periods (in days) the admin dashboard charts can show
+CHART_PERIODS = {'7', '30', '90', '365'}
+
+TASK_CARD_KEYS = [
+    'total_words_ongoing', 'ongoing_tasks_count', 'total_words_task_due',
+    'tomorrow_tasks_count', 'total_words_this_month', 'this_month_tasks_count',
+]
+
+
+def kpis(today, chart_days):
+    """Metric cards, system overview and task status distribution"""
+    task_counts = dashboard_metrics.task_counters(today)
+    revenue = dashboard_metrics.revenue_totals(today)
+    dashboard_data = {key: task_counts[key] for key in TASK_CARD_KEYS}
+    dashboard_data.update({key: value for key, value in revenue.items() if key != 'currency_breakdown'})
+
+    system_stats = dashboard_metrics.user_counters()
+    system_stats.update({
+        'total_tasks': task_counts['total_tasks'],
+        'completed_tasks': task_counts['completed_tasks'],
+        'total_invoices': revenue['received_invoices_count'] + revenue['pending_invoices_count'],
+        'paid_invoices': revenue['received_invoices_count'],
+    })
+    return {
+        'dashboard_data': dashboard_data,
+        'system_stats': system_stats,
+        'status_distribution': {
+            'pending': task_counts['pending_tasks'],
+            'in_progress': task_counts['ongoing_tasks_count'],
+            'completed': task_counts['completed_tasks'],
+        },
+    }
+
+
+def currency_breakdown(today, chart_days):
+    """Paid and due amounts per invoice currency"""
+    return {'currency_breakdown': dashboard_metrics.revenue_totals(today)['currency_breakdown']}
+
+
+def charts(today, chart_days):
+    """Payment and word series, read from the DailyMetrics rollup in one query"""
+    series = rollups.daily_series(today - timedelta(days=chart_days - 1), today)
+    return {
+        'chart_days': chart_days,
+        'payment_chart_data': [
+            {'date': day['date'].strftime('%m/%d'), 'amount': day['amount_inr']} for day in series
+        ],
+        'word_chart_data': [
+            {'date': day['date'].strftime('%m/%d'), 'words': day['words']} for day in series
+        ],
+    }
+
+
+def expert_payouts(today, chart_days):
+    """Top five experts by outstanding invoice balance due in the next 7 days
+
+    One query grouped by expert; balances convert at the cached current rates
+    and the top five are picked in SQL.
+    """
+    since, until = dates.date_range_bounds(today, today + timedelta(days=7))
+    balance_inr = ExpressionWrapper(
+        (F('invoice__amount_due') - F('invoice__amount_paid')) * fx.rate_case(currency='invoice__currency'),
+        output_field=fx.AMOUNT_FIELD,
+    )
+    rows = Task.objects.filter(
+        allocation__role='expert',
+        allocation__is_active=True,
+        deadline__gte=since,
+        deadline__lt=until,
+        status__in=['InProgress', 'Pending'],
+        invoice__amount_due__gt=F('invoice__amount_paid'),
+    ).values(
+        'allocation', 'allocation__username', 'allocation__first_name', 'allocation__last_name',
+    ).annotate(
+        amount=Sum(balance_inr),
+        task_count=Count('id'),
+    ).order_by('-amount')[:5]
+
+    expert_payments = [
+        {
+            'expert_name': f"{row['allocation__first_name']} {row['allocation__last_name']}".strip()
+            or row['allocation__username'],
+            'amount': float(row['amount']),
+            'task_count': row['task_count'],
+        }
+        for row in rows
+    ]
+    return {'expert_payments': expert_payments}
+
+
+def upcoming_calendar(today, chart_days):
+    """The next ten task deadlines within 7 days"""
+    upcoming_tasks = Task.objects.filter(
+        dates.in_range('deadline', today, today + timedelta(days=7))
+    ).select_related('client', 'allocation').order_by('deadline')[:10]
+
+    calendar_tasks = []
+    for task in upcoming_tasks:
+        calendar_tasks.append({
+            'task_code': task.task_code,
+            'client_name': f"{task.client.first_name} {task.client.last_name}".strip() or task.client.username,
+            'deadline': task.deadline.strftime('%Y-%m-%d'),
+            'deadline_formatted': task.deadline.strftime('%b %d'),
+            'status': task.status,
+            'allocation': task.allocation.username if task.allocation else 'Unassigned'
+        })
+    return {'calendar_tasks': calendar_tasks}
+
+
+def recent_activity(today, chart_days):
+    """Tasks created and payments received this week"""
+    this_week_start = today - timedelta(days=today.weekday())
+    recent_tasks = Task.objects.filter(
+        dates.on_or_after('created_at', this_week_start)
+    ).select_related('client', 'created_by').order_by('-created_at')[:5]
+
+    recent_payments = Invoice.objects.filter(
+        dates.on_or_after('payment_date', this_week_start)
+    ).select_related('task', 'task__client').order_by('-payment_date')[:5]
+    # Lists, not querysets, so the context can be cached
+    return {'recent_tasks': list(recent_tasks), 'recent_payments': list(recent_payments)}
+
+
+# template: partial rendered into the page (None for data-only widgets)
+# data_keys: context entries returned as JSON for the page script
+Widget = namedtuple('Widget', 'compute template data_keys')
+
+WIDGETS = {
+    'kpis': Widget(kpis, 'accounts/dashboard_widgets/kpis.html', ['system_stats', 'status_distribution']),
+    'currency_breakdown': Widget(currency_breakdown, 'accounts/dashboard_widgets/currency_breakdown.html', []),
+    'charts': Widget(charts, None, ['chart_days', 'payment_chart_data', 'word_chart_data']),
+    'expert_payouts': Widget(expert_payouts, 'accounts/dashboard_widgets/expert_payouts.html', []),
+    'upcoming_calendar': Widget(upcoming_calendar, 'accounts/dashboard_widgets/upcoming_calendar.html', []),
+    'recent_activity': Widget(recent_activity, 'accounts/dashboard_widgets/recent_activity.html', []),
+}
+
+
+def render_widget(name, role, chart_days=7):
+    """JSON-ready payload for one widget, computed or served from the dashboard cache"""
+    widget = WIDGETS[name]
+    today = dates.business_today()
+    # Only the charts depend on the selected period
+    params = ['widget', name, chart_days] if name == 'charts' else ['widget', name]
+    cached = dashboard_cache.get_or_compute(role, params, lambda: widget.compute(today, chart_days))
+    context = cached['context']
+    return {
+        'widget': name,
+        'computed_at': cached['computed_at'].isoformat(),
+        'html': render_to_string(widget.template, context) if widget.template else '',
+        'data': {key: context[key] for key in widget.data_keys},
+    }
@@ -0,0 +1,92 @@
+"""
+Business calendar helpers.
+
+Timestamps are stored in UTC, but days, weeks and months on reports follow
+the business time zone (``BUSINESS_TIME_ZONE``, defaulting to ``TIME_ZONE``),
+so a payment at 01:00 IST counts towards that Indian calendar day.
+"""
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+def business_timezone():
+    return ZoneInfo(getattr(settings, 'BUSINESS_TIME_ZONE', settings.TIME_ZONE))
+
+
+def business_today():
+    return timezone.localdate(timezone=business_timezone())
+
+
+def business_date(value):
+    """Calendar date of an aware datetime in the business time zone"""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localdate(value, timezone=business_timezone())
+
+
+def start_of_day(day):
+    """Aware datetime for midnight at the start of ``day`` in the business time zone"""
+    return datetime.combine(day, time.min, tzinfo=business_timezone())
+
+
+def date_range_bounds(start, end):
+    """Half-open ``[start 00:00, day after end 00:00)`` datetimes covering the dates start..end"""
+    return start_of_day(start), start_of_day(end + timedelta(days=1))
+
+
+def month_bounds(year, month):
+    """Half-open datetimes covering calendar month ``month`` of ``year``"""
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return start_of_day(first), start_of_day(following)
+
+
+def year_bounds(year):
+    """Half-open datetimes covering calendar year ``year``"""
+    return start_of_day(date(year, 1, 1)), start_of_day(date(year + 1, 1, 1))
+
+
+def months_before(day, months):
+    """The date ``months`` calendar months before ``day``, clamped to the end of shorter months"""
+    index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(index, 12)
+    following = date(year + (month + 1) // 12, (month + 1) % 12 + 1, 1)
+    return date(year, month + 1, min(day.day, (following - timedelta(days=1)).day))
+
+
+# Filters on a datetime field as plain ``>= start AND < end`` comparisons,
+# which an index on the column can serve. Lookups like ``deadline__date`` or
+# ``payment_date__date__range`` wrap the column in a function and force a
+# full scan, and they follow TIME_ZONE rather than the business time zone.
+
+def _between(field, since, until):
+    return Q(**{f'{field}__gte': since, f'{field}__lt': until})
+
+
+def on_day(field, day):
+    """Q for ``field`` falling on business date ``day``"""
+    return _between(field, *date_range_bounds(day, day))
+
+
+def in_range(field, start, end):
+    """Q for ``field`` falling on any business date from ``start`` to ``end`` inclusive"""
+    return _between(field, *date_range_bounds(start, end))
+
+
+def in_month(field, year, month):
+    """Q for ``field`` falling in a business calendar month"""
+    return _between(field, *month_bounds(year, month))
+
+
+def in_year(field, year):
+    """Q for ``field`` falling in a business calendar year"""
+    return _between(field, *year_bounds(year))
+
+
+def on_or_after(field, day):
+    """Q for ``field`` falling on business date ``day`` or later"""
+    return Q(**{f'{field}__gte': start_of_day(day)})
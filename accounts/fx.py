@@ -0,0 +1,283 @@
+"""
+Process-wide exchange rate service.
+
+All currency conversion in the app reads from a single in-memory rate table
+loaded from the current ``ExchangeRate`` snapshot (see ``current_snapshot``),
+which the refresh_fx_rates command keeps up to date. Request handlers never call the exchange rate API
+themselves. Rates are served from memory for ``FX_RATE_TTL`` seconds. After
+that the stale rates are still returned (for up to ``FX_RATE_STALE_TTL``
+seconds) while one background thread reloads them, and only one thread per process reloads them at a time, so
+concurrent requests cannot stampede the database.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncDate
+
+from . import dates
+
+SUPPORTED_CURRENCIES = ('INR', 'USD', 'EUR', 'GBP')
+
+# Fallback rates (1 unit of currency in INR) if no snapshot is available
+FALLBACK_RATES = {
+    'INR': 1.0,
+    'USD': 82.0,
+    'EUR': 88.5,
+    'GBP': 101.2,
+}
+
+
+def current_snapshot():
+    """Queryset of the current INR snapshot's rows: latest effective date, then latest fetch
+
+    Backfilled history (refresh_fx_rates --date) is fetched later but
+    effective earlier, so it never becomes the current snapshot.
+    """
+    from .models import ExchangeRate
+
+    latest = ExchangeRate.objects.filter(quote_currency='INR').order_by('-effective_date', '-fetched_at')[:1]
+    return ExchangeRate.objects.filter(
+        quote_currency='INR',
+        effective_date=Subquery(latest.values('effective_date')),
+        fetched_at=Subquery(latest.values('fetched_at')),
+    )
+
+
+def load_snapshot_rates():
+    """Read the current INR rate snapshot in a single indexed query"""
+    rows = list(current_snapshot().values_list('base_currency', 'rate', 'source'))
+    if not rows:
+        raise LookupError('No exchange rate snapshot found, run the refresh_fx_rates command')
+    return {code: float(rate) for code, rate, source in rows}, rows[0][2]
+
+
+class FxRateService:
+    """TTL cache with stale-while-revalidate and single-flight refresh"""
+
+    def __init__(self, loader=load_snapshot_rates):
+        self.loader = loader
+        self._rates = None
+        self._source = None
+        self._fresh_until = 0.0
+        self._stale_until = 0.0
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'errors': 0,
+            'fallbacks': 0,
+        }
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'FX_RATE_TTL', 5 * 60)
+
+    @property
+    def stale_ttl(self):
+        return getattr(settings, 'FX_RATE_STALE_TTL', 24 * 60 * 60)
+
+    @property
+    def error_ttl(self):
+        return getattr(settings, 'FX_RATE_ERROR_TTL', 60)
+
+    def get_rates(self):
+        """Return a copy of the INR rate table, refreshing it if needed"""
+        now = time.monotonic()
+        with self._state_lock:
+            if self._rates is not None and now < self._fresh_until:
+                self.stats['hits'] += 1
+                return dict(self._rates)
+            if self._rates is not None and now < self._stale_until:
+                self.stats['stale_hits'] += 1
+                rates = dict(self._rates)
+                refresh_in_background = True
+            else:
+                self.stats['misses'] += 1
+                refresh_in_background = False
+
+        if refresh_in_background:
+            threading.Thread(target=self._refresh_if_idle, daemon=True).start()
+            return rates
+        return self._refresh_blocking()
+
+    def get_rate(self, currency):
+        """Return the INR value of one unit of ``currency``"""
+        return self.get_rates().get(currency, 1.0)
+
+    @property
+    def source(self):
+        return self._source
+
+    def clear(self):
+        """Drop cached rates so the next read reloads them"""
+        with self._state_lock:
+            self._rates = None
+            self._source = None
+            self._fresh_until = 0.0
+            self._stale_until = 0.0
+
+    def _refresh_blocking(self):
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            with self._state_lock:
+                if self._rates is not None and time.monotonic() < self._fresh_until:
+                    return dict(self._rates)
+            self._refresh()
+        with self._state_lock:
+            return dict(self._rates)
+
+    def _refresh_if_idle(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        finally:
+            self._refresh_lock.release()
+            # Background threads get their own DB connection; don't leak it
+            connections.close_all()
+
+    def _refresh(self):
+        try:
+            loaded, source = self.loader()
+            rates = dict(FALLBACK_RATES)
+            rates.update(loaded)
+            rates['INR'] = 1.0
+            ttl = self.ttl
+        except Exception as e:
+            print(f"Exchange rate refresh failed: {e}")
+            with self._state_lock:
+                self.stats['errors'] += 1
+                if self._rates is not None:
+                    # Keep serving the last good rates and retry later
+                    self._fresh_until = time.monotonic() + self.error_ttl
+                    return
+            rates = dict(FALLBACK_RATES)
+            source = 'fallback'
+            ttl = self.error_ttl
+            with self._state_lock:
+                self.stats['fallbacks'] += 1
+
+        now = time.monotonic()
+        with self._state_lock:
+            self.stats['refreshes'] += 1
+            self._rates = rates
+            self._source = source
+            self._fresh_until = now + ttl
+            self._stale_until = now + max(ttl, self.stale_ttl)
+
+
+fx_rates = FxRateService()
+
+
+def get_rates():
+    """INR rate table keyed by currency code, e.g. ``{'USD': 83.1, ...}``"""
+    return fx_rates.get_rates()
+
+
+def get_rate(currency):
+    """INR value of one unit of ``currency``"""
+    return fx_rates.get_rate(currency)
+
+
+def inr_rate(currency, exchange_rates=None):
+    """INR rate for ``currency`` from either rate format, or the cached rates"""
+    if currency == 'INR':
+        return 1.0
+    if not exchange_rates:
+        return get_rate(currency)
+    if currency in exchange_rates:
+        return float(exchange_rates[currency])
+    return float(exchange_rates.get(f'{currency}_TO_INR', FALLBACK_RATES.get(currency, 1.0)))
+
+
+def convert_to_inr(amount, currency, exchange_rates=None):
+    """Convert a single amount to INR"""
+    return float(amount or 0) * inr_rate(currency, exchange_rates)
+
+
+def convert_many_to_inr(rows, exchange_rates=None):
+    """Convert ``(amount, currency)`` pairs to INR in one pass
+
+    The rate table is resolved once up front instead of per value.
+    """
+    rates = dict(get_rates() if not exchange_rates else {
+        code: inr_rate(code, exchange_rates) for code in SUPPORTED_CURRENCIES
+    })
+    return [float(amount or 0) * rates.get(currency, 1.0) for amount, currency in rows]
+
+
+def get_exchange_rates():
+    """Rates in the legacy ``USD_TO_INR`` format used by the payment helpers"""
+    rates = fx_rates.get_rates()
+    return {
+        'USD_TO_INR': rates['USD'],
+        'EUR_TO_INR': rates['EUR'],
+        'GBP_TO_INR': rates['GBP'],
+        'last_updated': fx_rates.source,
+    }
+
+
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+AMOUNT_FIELD = DecimalField(max_digits=26, decimal_places=10)
+
+
+def rate_case(rates=None, currency='currency'):
+    """SQL expression picking the INR rate for each row's ``currency`` column"""
+    rates = rates or get_rates()
+    return Case(
+        *[When(**{currency: code}, then=Value(rate)) for code, rate in rates.items()],
+        default=Value(1.0),
+        output_field=RATE_FIELD,
+    )
+
+
+def historical_rate(currency='currency', on='payment_day', rates=None):
+    """SQL expression for the INR rate that was in effect on each row's ``on`` date
+
+    ``on`` must name a date (not datetime) column or annotation. Rows with no
+    date, or dated before the first stored rate, fall back to the current rates.
+    """
+    from .models import ExchangeRate
+
+    effective = ExchangeRate.objects.filter(
+        quote_currency='INR',
+        base_currency=OuterRef(currency),
+        effective_date__lte=OuterRef(on),
+    ).order_by('-effective_date', '-fetched_at').values('rate')[:1]
+    return Case(
+        When(**{currency: 'INR'}, then=Value(1)),
+        default=Coalesce(Subquery(effective, output_field=RATE_FIELD), rate_case(rates, currency)),
+        output_field=RATE_FIELD,
+    )
+
+
+def with_paid_inr_at_payment_date(queryset, rates=None):
+    """Annotate invoices with ``amount_paid_inr`` converted at the payment date rate
+
+    The payment date is the business day it fell on, like the dashboard buckets.
+    """
+    return queryset.annotate(
+        payment_day=TruncDate('payment_date', tzinfo=dates.business_timezone()),
+        payment_rate=historical_rate(rates=rates),
+        amount_paid_inr=ExpressionWrapper(F('amount_paid') * F('payment_rate'), output_field=AMOUNT_FIELD),
+    )
+
+
+def with_inr_amounts(queryset, rates=None):
+    """Annotate invoices with INR due/paid/balance amounts at the current rates"""
+    queryset = queryset.annotate(current_rate=rate_case(rates))
+    return queryset.annotate(
+        amount_due_inr=ExpressionWrapper(F('amount_due') * F('current_rate'), output_field=AMOUNT_FIELD),
+        amount_paid_inr=ExpressionWrapper(F('amount_paid') * F('current_rate'), output_field=AMOUNT_FIELD),
+        balance_due_inr=ExpressionWrapper(
+            (F('amount_due') - F('amount_paid')) * F('current_rate'), output_field=AMOUNT_FIELD
+        ),
+    )
@@ -0,0 +1,204 @@
+"""
+Exchange rate providers used by the refresh_fx_rates command.
+
+A provider is any object with a ``name`` and a ``fetch()`` method returning
+INR rates keyed by currency code, e.g. ``{'USD': 83.1, 'EUR': 90.2}``.
+
+The HTTP provider goes through a circuit breaker shared by every provider
+instance in the process: after ``FX_BREAKER_FAILURES`` consecutive failures
+calls fail fast for ``FX_BREAKER_RESET`` seconds, then a single probe is let
+through to decide whether to close the circuit again. Each fetch also has a
+total time budget (``FX_HTTP_BUDGET``) shared by all of its retries.
+"""
+import json
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .fx import FALLBACK_RATES, SUPPORTED_CURRENCIES
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while its circuit is open"""
+
+
+class BudgetExceededError(Exception):
+    """Raised when a fetch runs out of its total time budget"""
+
+
+class CircuitBreaker:
+    """Closed -> open after N failures -> half-open probe after a cool-down"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go through now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                # A slow call that started before the circuit opened; the
+                # cool-down still applies
+                return
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderMetrics:
+    """Thread-safe counters for provider calls"""
+    FIELDS = ('calls', 'successes', 'failures', 'timeouts', 'retries', 'short_circuits')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field):
+        with self._lock:
+            self.counts[field] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+metrics = ProviderMetrics()
+
+
+def get_breaker(key):
+    """Process-wide circuit breaker for ``key`` (usually a provider URL)"""
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(
+                failure_threshold=getattr(settings, 'FX_BREAKER_FAILURES', 3),
+                reset_timeout=getattr(settings, 'FX_BREAKER_RESET', 60),
+            )
+        return _breakers[key]
+
+
+class HttpRateProvider:
+    """Live rates from exchangerate-api.com (free tier)"""
+    name = 'exchangerate-api'
+    url = 'https://api.exchangerate-api.com/v4/latest/USD'
+
+    def __init__(self, url=None, timeout=None, budget=None, retries=None):
+        self.url = url or getattr(settings, 'FX_HTTP_URL', self.url)
+        self.timeout = timeout or getattr(settings, 'FX_HTTP_TIMEOUT', 3)
+        self.budget = budget or getattr(settings, 'FX_HTTP_BUDGET', 8)
+        self.retries = getattr(settings, 'FX_HTTP_RETRIES', 2) if retries is None else retries
+        self.breaker = get_breaker(self.url)
+
+    def fetch(self):
+        deadline = time.monotonic() + self.budget
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BudgetExceededError(f'Time budget of {self.budget}s exhausted: {last_error}')
+            if not self.breaker.allow():
+                metrics.incr('short_circuits')
+                raise CircuitOpenError(f'Circuit open for {self.url}')
+            if attempt:
+                metrics.incr('retries')
+            metrics.incr('calls')
+            try:
+                response = requests.get(self.url, timeout=min(self.timeout, remaining))
+                response.raise_for_status()
+                rates = usd_rates_to_inr(response.json()['rates'])
+            except Exception as e:
+                metrics.incr('timeouts' if isinstance(e, requests.Timeout) else 'failures')
+                self.breaker.record_failure()
+                last_error = e
+                continue
+            metrics.incr('successes')
+            self.breaker.record_success()
+            return rates
+        raise last_error
+
+
+class FileRateProvider:
+    """Rates read from a local JSON file, for offline runs
+
+    The file holds either INR rates (``{"USD": 83.1, ...}``) or an
+    exchangerate-api style payload (``{"rates": {"USD": 1, "INR": 83.1, ...}}``).
+    """
+    name = 'file'
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, 'FX_RATE_FILE', None)
+        if not self.path:
+            raise ValueError('FileRateProvider needs a path (--file or FX_RATE_FILE)')
+
+    def fetch(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'rates' in data:
+            return usd_rates_to_inr(data['rates'])
+        return {code: float(data[code]) for code in SUPPORTED_CURRENCIES if code in data}
+
+
+class StubRateProvider:
+    """Fixed fallback rates, for development and tests"""
+    name = 'stub'
+
+    def fetch(self):
+        return dict(FALLBACK_RATES)
+
+
+PROVIDERS = {
+    'http': HttpRateProvider,
+    'file': FileRateProvider,
+    'stub': StubRateProvider,
+}
+
+
+def get_provider(name=None, **kwargs):
+    """Build a provider by short name or dotted import path"""
+    name = name or getattr(settings, 'FX_RATE_PROVIDER', 'http')
+    provider_class = PROVIDERS.get(name) or import_string(name)
+    return provider_class(**kwargs)
+
+
+def usd_rates_to_inr(rates):
+    """Convert a USD-based rate table into INR rates for supported currencies"""
+    inr_per_usd = float(rates['INR'])
+    return {
+        code: inr_per_usd / float(rates[code])
+        for code in SUPPORTED_CURRENCIES
+        if rates.get(code)
+    }
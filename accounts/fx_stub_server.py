@@ -0,0 +1,76 @@
+"""
+Local stand-in for the exchange rate API, for offline load and failure tests.
+
+    with run_stub_server(latency=0.5, failure_rate=0.2) as server:
+        HttpRateProvider(url=server.url).fetch()
+
+Every request waits ``latency`` seconds (plus up to ``jitter`` more) and then
+fails with HTTP 503 with probability ``failure_rate``. ``hang=True`` makes the
+server never answer, to exercise client timeouts.
+"""
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_RATES = {'USD': 1.0, 'INR': 83.0, 'EUR': 0.92, 'GBP': 0.79}
+
+
+class StubRateHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.hang:
+            time.sleep(3600)
+            return
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        if random.random() < server.failure_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = json.dumps({'base': 'USD', 'rates': STUB_RATES}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubRateServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, jitter=0.0, failure_rate=0.0, hang=False):
+        super().__init__(address, StubRateHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang = hang
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v4/latest/USD'
+
+
+@contextmanager
+def run_stub_server(**options):
+    """Serve stub rates on a free local port in a background thread"""
+    server = StubRateServer(**options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,101 @@
+"""
+Full-text search over invoices for the invoice management search box.
+
+Each invoice has one search row holding its number, the task code and
+module name, and the client's username and full name (see
+accounts/search_index.py). A search therefore reads one index instead of
+joining invoices, tasks and users. ``INV202412`` finds that month's
+invoices, and ``priya sh`` finds Priya Sharma's.
+
+Saving or deleting an invoice updates its row. So do changes to its task
+and to the client's names (accounts/signals.py). Bulk writes skip signals,
+so run ``rebuild_invoice_search`` after them.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .models import Invoice, Task, User
+from .search_index import SearchIndex, number_terms, supported
+
+SEARCH_TABLE = 'accounts_invoice_search'
+
+# Client fields copied into the search document
+CLIENT_FIELDS = {'username', 'first_name', 'last_name'}
+
+INDEX = SearchIndex(
+    table=SEARCH_TABLE,
+    model=Invoice,
+    key_column='invoice_id',
+    key='i.id',
+    source=(
+        f'FROM {Invoice._meta.db_table} i JOIN {Task._meta.db_table} t ON t.id = i.task_id '
+        f'JOIN {User._meta.db_table} u ON u.id = t.client_id'
+    ),
+    columns=[
+        ('invoice_number', number_terms('i.invoice_number'), 10.0, 'A'),
+        ('task_code', number_terms('t.task_code'), 8.0, 'A'),
+        ('module_name', 't.module_name', 3.0, 'B'),
+        ('client', "u.username || ' ' || u.first_name || ' ' || u.last_name", 5.0, 'B'),
+    ],
+)
+
+
+def create_index(schema_editor):
+    INDEX.create(schema_editor)
+
+
+def drop_index(schema_editor):
+    INDEX.drop(schema_editor)
+
+
+def index_invoice(sender, instance, **kwargs):
+    """post_save receiver for Invoice"""
+    using = kwargs.get('using', DEFAULT_DB_ALIAS)
+    if supported(using):
+        INDEX.reindex('i.id = %s', [instance.pk], using)
+
+
+def unindex_invoice(sender, instance, **kwargs):
+    """post_delete receiver for Invoice"""
+    INDEX.remove(instance.pk, kwargs.get('using', DEFAULT_DB_ALIAS))
+
+
+def reindex_task_invoice(sender, instance, created=False, **kwargs):
+    """post_save receiver for Task: its code and module name are part of the invoice document"""
+    using = kwargs.get('using', DEFAULT_DB_ALIAS)
+    if created or not supported(using):
+        # A new task has no invoice yet
+        return
+    INDEX.reindex('t.id = %s', [instance.pk], using)
+
+
+def reindex_client_invoices(sender, instance, created=False, update_fields=None, **kwargs):
+    """post_save receiver for User: keep a client's invoices findable by their current names"""
+    using = kwargs.get('using', DEFAULT_DB_ALIAS)
+    if created or not supported(using):
+        return
+    if update_fields is not None and not CLIENT_FIELDS & set(update_fields):
+        return
+    INDEX.reindex('t.client_id = %s', [instance.pk], using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Reindex every invoice; returns the number of rows written"""
+    return INDEX.rebuild(using)
+
+
+def legacy_filter(text):
+    """The substring match invoice_management used before the search index"""
+    return (
+        Q(invoice_number__icontains=text) |
+        Q(task__task_code__icontains=text) |
+        Q(task__module_name__icontains=text) |
+        Q(task__client__username__icontains=text) |
+        Q(task__client__first_name__icontains=text) |
+        Q(task__client__last_name__icontains=text)
+    )
+
+
+def search(queryset, text):
+    """``queryset`` narrowed to invoices matching every word of ``text`` as a prefix, best match first"""
+    return INDEX.search(queryset, text, legacy_filter)
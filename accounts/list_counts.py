@@ -0,0 +1,130 @@
+"""
+Cached totals and filter facet counts for the task, invoice and user lists.
+
+Entries are keyed by list, a per-list version and the normalized filter
+parameters, so "?status=Pending&search=Essay" and "?search=essay&status=Pending"
+share one entry. Saving or deleting a row replaces the versions of the lists
+it appears in (see accounts/signals.py), and the stale entries expire.
+
+Facets come from one grouped query over the list with its search applied
+but none of its facet filters. Each facet then counts the rows matching the
+*other* facets' selections, so the status dropdown shows how many of the
+selected expert's tasks have each status.
+
+Entries live in the dashboard cache (see dashboard_cache.get_cache), which
+worker processes share when DASHBOARD_CACHE_DIR is set.
+"""
+import hashlib
+import time
+
+from django.db import transaction
+from django.db.models import Count
+
+from .dashboard_cache import get_cache
+from .pagination import approximate_count
+
+# Facet name (the list's filter parameter) -> field grouped on
+FACETS = {
+    'tasks': {'status': 'status', 'allocation': 'allocation_id'},
+    'invoices': {'status': 'payment_status', 'client': 'task__client_id'},
+    'users': {'role': 'role', 'status': 'is_active'},
+}
+
+# Lists whose rows show data from each model
+DEPENDENT_LISTS = {
+    'Task': ['tasks', 'invoices'],
+    'Invoice': ['invoices'],
+    'User': ['users', 'tasks', 'invoices'],
+}
+
+
+def normalize(filters):
+    """Filter parameters without blanks; search terms lowercased with single spaces"""
+    normalized = {}
+    for name, value in filters.items():
+        value = ' '.join((value or '').split())
+        if value:
+            normalized[name] = value.lower() if name == 'search' else value
+    return normalized
+
+
+def facet_value(value):
+    """A grouped value as the filter parameter that selects it"""
+    if value is None:
+        return 'unassigned'
+    if isinstance(value, bool):
+        return 'active' if value else 'inactive'
+    return str(value)
+
+
+def _version_key(list_name):
+    return f'list-counts:version:{list_name}'
+
+
+def get_version(list_name, cache):
+    version = cache.get(_version_key(list_name))
+    if version is None:
+        cache.add(_version_key(list_name), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(list_name))
+    return version
+
+
+def bump_versions(list_names):
+    get_cache().set_many({_version_key(name): time.time_ns() for name in list_names}, timeout=None)
+
+
+def invalidate(sender, update_fields=None, **kwargs):
+    """post_save/post_delete receiver: drop the cached counts of lists showing ``sender`` once the write commits"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        # Logins change no list
+        return
+    list_names = DEPENDENT_LISTS[sender.__name__]
+    transaction.on_commit(lambda: bump_versions(list_names))
+
+
+def _cached(list_name, kind, filters, compute):
+    cache = get_cache()
+    params = '&'.join(f'{name}={value}' for name, value in sorted(normalize(filters).items()))
+    key = ':'.join([
+        'list-counts', list_name, str(get_version(list_name, cache)), kind,
+        hashlib.md5(params.encode()).hexdigest(),
+    ])
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
+
+
+def counter(list_name, filters):
+    """``count`` function for pagination.paginate_request, cached under ``filters``"""
+    return lambda queryset: _cached(list_name, 'count', filters, lambda: approximate_count(queryset))
+
+
+def facet_counts(list_name, queryset, filters):
+    """{facet: {filter value: count}} for the list
+
+    ``queryset`` is the list with its search applied and no facet filters;
+    ``filters`` are the request's filter parameters (search and facets).
+    """
+    facets = FACETS[list_name]
+    fields = list(facets.values())
+
+    def compute():
+        rows = queryset.order_by().values(*fields).annotate(rows=Count('pk')).values_list(*fields, 'rows')
+        return [(tuple(facet_value(value) for value in row[:-1]), row[-1]) for row in rows]
+
+    # Grouped once per search; the facet selections are applied below
+    search = {name: value for name, value in filters.items() if name not in facets}
+    groups = _cached(list_name, 'facets', search, compute)
+
+    selected = {name: value for name, value in normalize(filters).items() if name in facets}
+    counts = {name: {} for name in facets}
+    for values, rows in groups:
+        values = dict(zip(facets, values))
+        mismatched = [name for name, value in selected.items() if values[name] != value]
+        for name in facets:
+            # A facet ignores its own selection, so every option shows a count
+            if not mismatched or mismatched == [name]:
+                counts[name][values[name]] = counts[name].get(values[name], 0) + rows
+    return counts
@@ -0,0 +1,166 @@
+"""
+Batched sending over pooled SMTP connections.
+
+Opening an SMTP connection (TCP, STARTTLS, AUTH) costs far more than sending
+one message over it, and ``send_mail`` opens a new one per email. A
+``Dispatcher`` instead holds one authenticated connection from
+``get_connection()`` and sends whole batches over it, so a burst of invoice
+resends or allocation notifications pays for one handshake per batch, not
+one per email. A connection the server dropped is reopened once and the
+message retried on it.
+
+Sending is paced by a ``RateLimiter`` shared by every dispatcher in the
+process, so all worker threads together stay within the provider's
+EMAIL_RATE_LIMIT messages per minute. Each worker process has its own
+limiter: with several processes, split the provider's limit between them.
+"""
+import smtplib
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+WINDOW = 60  # seconds the rate limit counts messages over
+
+
+class RateLimiter:
+    """Allows at most ``per_minute`` messages in any 60 seconds; 0 or None means no limit"""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.sent = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until one more message fits in the limit; returns the seconds waited"""
+        if not self.per_minute:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.sent and self.sent[0] <= now - WINDOW:
+                    self.sent.popleft()
+                if len(self.sent) < self.per_minute:
+                    self.sent.append(now)
+                    return waited
+                wait = self.sent[0] + WINDOW - now
+            time.sleep(wait)
+            waited += wait
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The process-wide limiter for EMAIL_RATE_LIMIT"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(getattr(settings, 'EMAIL_RATE_LIMIT', 0))
+        return _limiter
+
+
+class BatchTiming:
+    """Where the time of one ``send_batch`` went, in seconds"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent = 0
+        self.handshakes = 0
+        self.connect_seconds = 0.0
+        self.throttle_seconds = 0.0
+        self.total_seconds = 0.0
+
+    @property
+    def failed(self):
+        return self.messages - self.sent
+
+    def __str__(self):
+        return (
+            f'{self.sent}/{self.messages} sent in {self.total_seconds * 1000:.0f} ms '
+            f'({self.handshakes} handshakes {self.connect_seconds * 1000:.0f} ms, '
+            f'throttled {self.throttle_seconds * 1000:.0f} ms)'
+        )
+
+
+def _connection_lost(error):
+    # SMTP errors that leave the session usable are SMTPException subclasses
+    return isinstance(error, smtplib.SMTPServerDisconnected) or not isinstance(error, smtplib.SMTPException)
+
+
+class Dispatcher:
+    """Sends batches of EmailMessages over one reused connection; one per worker thread"""
+
+    def __init__(self, connection=None, limiter=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.limiter = limiter or get_rate_limiter()
+        self.is_open = False
+        self.open_failed = False
+
+    def open(self, timing):
+        start = time.perf_counter()
+        try:
+            self.connection.open()
+        except Exception:
+            # e.g. a failed login leaves the backend holding a half-open session
+            self.close()
+            self.open_failed = True
+            raise
+        finally:
+            timing.handshakes += 1
+            timing.connect_seconds += time.perf_counter() - start
+        self.is_open, self.open_failed = True, False
+
+    def close(self):
+        """Close the connection, e.g. when the queue runs dry; the next batch reopens it"""
+        self.is_open = False
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+    def _send(self, message, timing):
+        reused = self.is_open
+        if not reused:
+            self.open(timing)
+        try:
+            # send_messages keeps a connection it did not open
+            self.connection.send_messages([message])
+        except Exception as e:
+            if not _connection_lost(e):
+                raise
+            self.close()
+            if not reused:
+                raise
+            # Dropped while idle between batches: one more try on a fresh connection
+            self.open(timing)
+            self.connection.send_messages([message])
+
+    def send_batch(self, messages):
+        """Send ``messages``; returns (errors, timing)
+
+        ``errors[i]`` is None if the server accepted ``messages[i]`` and
+        the exception otherwise. If the connection cannot be opened, the
+        rest of the batch fails with that error without further attempts.
+        """
+        timing = BatchTiming(len(messages))
+        errors = []
+        start = time.perf_counter()
+        for message in messages:
+            timing.throttle_seconds += self.limiter.acquire()
+            try:
+                self._send(message, timing)
+            except Exception as e:
+                errors.append(e)
+                if self.open_failed:
+                    errors.extend([e] * (len(messages) - len(errors)))
+                    break
+            else:
+                errors.append(None)
+                timing.sent += 1
+        timing.total_seconds = time.perf_counter() - start
+        return errors, timing
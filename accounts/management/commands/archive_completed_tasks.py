@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import archive, dates
+
+
+class Command(BaseCommand):
+    help = 'Move tasks completed and paid more than N months ago, with their invoices and attachments, to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12, help='Archive tasks and invoices untouched this long')
+        parser.add_argument('--batch-size', type=int, default=500, help='Tasks moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many tasks would move')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        cutoff = dates.start_of_day(dates.months_before(dates.business_today(), options['months']))
+
+        if options['dry_run']:
+            count = archive.archivable(cutoff).count()
+            self.stdout.write(f'{count} tasks completed and paid before {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        moved = 0
+        while True:
+            batch = archive.archive_batch(cutoff, options['batch_size'])
+            if not batch:
+                break
+            moved += batch
+            self.stdout.write(f'  archived {moved} tasks')
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} tasks completed and paid before {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,72 @@
+from unittest import mock
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts import dashboard_cache, dashboard_widgets, fx
+from accounts.benchmarks import rolled_back, seed_invoices, timed
+
+
+class Command(BaseCommand):
+    help = 'Count outbound HTTP calls and rate snapshot reads made by the admin dashboard widgets with a cold and a warm FX cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=500, help='Invoices to seed (rolled back afterwards)')
+        parser.add_argument('--runs', type=int, default=5, help='Warm dashboard renders to time')
+
+    def handle(self, *args, **options):
+        calls = []
+
+        def fail_request(session, method, url, *args, **kwargs):
+            calls.append(url)
+            raise requests.ConnectionError('Outbound HTTP is disabled during the benchmark')
+
+        results = {}
+
+        with rolled_back(), mock.patch.object(requests.Session, 'request', autospec=True, side_effect=fail_request):
+            seed_invoices(options['invoices'])
+
+            fx.fx_rates.clear()
+            with timed(results, 'cold'), CaptureQueriesContext(connection) as cold_queries:
+                render_dashboard()
+            cold_calls = len(calls)
+
+            calls.clear()
+            with timed(results, 'warm'), CaptureQueriesContext(connection) as warm_queries:
+                for _ in range(options['runs']):
+                    render_dashboard()
+            warm_calls = len(calls)
+
+        self.stdout.write(f"Invoices seeded: {options['invoices']}")
+        self.stdout.write(
+            f"Cold cache: {cold_calls} outbound calls, "
+            f"{count_rate_reads(cold_queries)} snapshot reads, {results['cold']:.1f} ms"
+        )
+        self.stdout.write(
+            f"Warm cache: {warm_calls} outbound calls, "
+            f"{count_rate_reads(warm_queries)} snapshot reads over {options['runs']} renders, "
+            f"{results['warm'] / options['runs']:.1f} ms per render"
+        )
+        self.stdout.write(f"Cache stats: {fx.fx_rates.stats}")
+
+        if warm_calls:
+            raise CommandError('The dashboard widgets made outbound FX calls with a warm cache')
+
+
+def render_dashboard():
+    # A new dashboard cache version makes every widget recompute, so each
+    # render goes through the rate lookups instead of the cached payloads
+    dashboard_cache.bump_version()
+    for name in dashboard_widgets.WIDGETS:
+        dashboard_widgets.render_widget(name, 'admin')
+
+
+def count_rate_reads(queries):
+    # Historical conversions embed the rate table as a subquery; only count
+    # standalone reads of the latest snapshot
+    return sum(
+        query['sql'].startswith('SELECT "accounts_exchangerate"')
+        for query in queries.captured_queries
+    )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from accounts import dates
+from accounts.benchmarks import best_time, rolled_back, seed_invoices, timed
+from accounts.models import Invoice, Task
+
+
+def date_filters(today):
+    """(label, ``__date`` lookup, dates helper) pairs for the filters the views use"""
+    tomorrow = today + timedelta(days=1)
+    month_start = today.replace(day=1)
+    week_start = today - timedelta(days=today.weekday())
+    week_ahead = today + timedelta(days=7)
+    return [
+        ('tasks due tomorrow',
+         Task.objects.filter(deadline__date=tomorrow),
+         Task.objects.filter(dates.on_day('deadline', tomorrow))),
+        ('tasks created this month',
+         Task.objects.filter(created_at__date__range=[month_start, today]),
+         Task.objects.filter(dates.in_range('created_at', month_start, today))),
+        ('payments today',
+         Invoice.objects.filter(payment_date__date=today, payment_status='Completed'),
+         Invoice.objects.filter(dates.on_day('payment_date', today), payment_status='Completed')),
+        ('calendar deadlines',
+         Task.objects.filter(deadline__year=today.year, deadline__month=today.month).order_by('deadline'),
+         Task.objects.filter(dates.in_month('deadline', today.year, today.month)).order_by('deadline')),
+        ('calendar payments',
+         Invoice.objects.filter(payment_date__year=today.year, payment_date__month=today.month),
+         Invoice.objects.filter(dates.in_month('payment_date', today.year, today.month))),
+        ('upcoming deadlines',
+         Task.objects.filter(deadline__date__range=[today, week_ahead]).order_by('deadline')[:10],
+         Task.objects.filter(dates.in_range('deadline', today, week_ahead)).order_by('deadline')[:10]),
+        ('tasks created this week',
+         Task.objects.filter(created_at__date__gte=week_start).order_by('-created_at')[:5],
+         Task.objects.filter(dates.on_or_after('created_at', week_start)).order_by('-created_at')[:5]),
+        ('payments this year',
+         Invoice.objects.filter(payment_date__year=today.year, amount_paid__gt=0),
+         Invoice.objects.filter(dates.in_year('payment_date', today.year), amount_paid__gt=0)),
+    ]
+
+
+def searches_index(plan):
+    """Whether a query plan narrows the rows with an index rather than scanning"""
+    if connection.vendor == 'sqlite':
+        return any('SEARCH' in line and 'INDEX' in line for line in plan.splitlines())
+    return 'Index' in plan
+
+
+def rows(queryset):
+    if queryset.query.is_sliced:
+        return [row.pk for row in queryset._chain()]
+    return queryset._chain().count()
+
+
+class Command(BaseCommand):
+    help = 'Compare __date lookups with the half-open range filters in accounts.dates and check index use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Tasks (each with an invoice) to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the best time is reported')
+
+    def handle(self, *args, **options):
+        today = dates.business_today()
+        results = {}
+        failures = []
+
+        with rolled_back():
+            with timed(results, 'seed'):
+                seed_invoices(options['rows'], batch_size=10000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Seeded {options['rows']} tasks and invoices in {results['seed'] / 1000:.1f}s\n")
+
+            self.stdout.write(f"{'filter':<26} {'__date ms':>10} {'range ms':>10} {'speed-up':>9}  plan")
+            # __date lookups follow the current time zone, so under the
+            # business time zone both forms must select the same rows
+            with timezone.override(dates.business_timezone()):
+                for label, lookup, helper in date_filters(today):
+                    lookup_ms = best_time(lookup, options['repeat'])
+                    helper_ms = best_time(helper, options['repeat'])
+                    plan = helper.explain()
+                    indexed = searches_index(plan)
+                    speedup = lookup_ms / helper_ms if helper_ms else float('inf')
+                    self.stdout.write(
+                        f"{label:<26} {lookup_ms:10.1f} {helper_ms:10.1f} {speedup:8.1f}x  "
+                        f"{'index' if indexed else 'SCAN'}"
+                    )
+                    if not indexed:
+                        failures.append(f'{label} does not use an index:\n{plan}')
+                    if rows(lookup) != rows(helper):
+                        failures.append(f'{label} selects different rows than its __date lookup')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Every date filter searches an index'))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from accounts.mail_dispatch import Dispatcher, RateLimiter
+from accounts.smtp_sink import run_smtp_sink
+
+
+class Command(BaseCommand):
+    help = 'Compare one SMTP connection per email with batches over a pooled connection, against the local sink'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument(
+            '--handshake-latency', type=float, default=0.15, help='Sink connection setup in seconds, standing in for TLS',
+        )
+        parser.add_argument('--latency', type=float, default=0.005, help='Sink time per message in seconds')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Messages per minute; 0 for none')
+
+    def handle(self, *args, **options):
+        count, batch_size = options['messages'], options['batch_size']
+        with run_smtp_sink(latency=options['latency'], handshake_latency=options['handshake_latency']) as sink, \
+                override_settings(EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port, EMAIL_USE_TLS=False):
+
+            def message(i):
+                return EmailMessage(f'Bench {i}', 'body', 'bench@example.com', [f'user{i}@example.com'])
+
+            # What send_mail does: a new connection for every email
+            start = time.perf_counter()
+            for i in range(count):
+                message(i).send()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Connection per email: {count} emails in {elapsed:.2f}s, {sink.connection_count} handshakes'
+            )
+
+            connections_before = sink.connection_count
+            dispatcher = Dispatcher(get_connection(), RateLimiter(options['rate_limit']))
+            start = time.perf_counter()
+            for offset in range(0, count, batch_size):
+                messages = [message(i) for i in range(offset, min(count, offset + batch_size))]
+                _, timing = dispatcher.send_batch(messages)
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'  batch {offset // batch_size + 1}: {timing}')
+                # Close between batches: the worst case, when the queue runs dry after every batch
+                dispatcher.close()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Pooled, batches of {batch_size}: {count} emails in {elapsed:.2f}s, '
+                f'{sink.connection_count - connections_before} handshakes'
+            )
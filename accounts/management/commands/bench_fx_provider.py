@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from accounts import fx_providers
+from accounts.fx_providers import HttpRateProvider
+from accounts.fx_stub_server import run_stub_server
+
+
+class Command(BaseCommand):
+    help = 'Load-test the HTTP rate provider against the local stub server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Total fetches')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--latency', type=float, default=0.05, help='Stub latency in seconds')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random stub latency in seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of stub responses that fail')
+        parser.add_argument('--hang', action='store_true', help='Stub never answers')
+        parser.add_argument('--timeout', type=float, default=1.0, help='Per-attempt timeout in seconds')
+        parser.add_argument('--budget', type=float, default=2.0, help='Total time budget per fetch in seconds')
+        parser.add_argument('--retries', type=int, default=2)
+
+    def handle(self, *args, **options):
+        fx_providers.metrics.reset()
+        stub_options = {
+            'latency': options['latency'],
+            'jitter': options['jitter'],
+            'failure_rate': options['failure_rate'],
+            'hang': options['hang'],
+        }
+
+        with run_stub_server(**stub_options) as server:
+            provider = HttpRateProvider(
+                url=server.url,
+                timeout=options['timeout'],
+                budget=options['budget'],
+                retries=options['retries'],
+            )
+
+            def fetch_once(_):
+                start = time.perf_counter()
+                try:
+                    provider.fetch()
+                    outcome = 'ok'
+                except fx_providers.CircuitOpenError:
+                    outcome = 'short-circuited'
+                except Exception:
+                    outcome = 'failed'
+                return outcome, time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(fetch_once, range(options['requests'])))
+            elapsed = time.perf_counter() - start
+            stub_requests = server.request_count
+
+        latencies = sorted(duration * 1000 for outcome, duration in results)
+        outcomes = {}
+        for outcome, duration in results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        self.stdout.write(f"{options['requests']} fetches in {elapsed:.2f}s with concurrency {options['concurrency']}")
+        self.stdout.write(f'Outcomes: {outcomes}')
+        self.stdout.write(f'Latency ms: p50={percentile(0.5):.1f} p95={percentile(0.95):.1f} max={latencies[-1]:.1f}')
+        self.stdout.write(f'Requests reaching the stub: {stub_requests}')
+        self.stdout.write(f'Breaker state: {provider.breaker.state}')
+        self.stdout.write(f'Provider metrics: {fx_providers.metrics.snapshot()}')
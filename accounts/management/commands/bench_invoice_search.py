@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts import invoice_search
+from accounts.benchmarks import best_page_time, rolled_back, seed_invoices, timed
+from accounts.models import Invoice
+from accounts.search_index import supported
+
+# (label, what a user types) -- benchmark invoices are numbered like their
+# tasks (BENCH<n>), for modules "Benchmark module <1-5000>", and all belong
+# to bench_client, so the client search is the match-everything worst case
+SEARCHES = [
+    ('invoice number', 'BENCH4242'),
+    ('module name', 'module 4242'),
+    ('client (all)', 'bench_client'),
+    ('no match', 'zzzz'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Time the invoice_management search at growing invoice volumes, with icontains filters and with the index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10000, 100000, 500000],
+            help='Invoice volumes to measure (each seeded and rolled back in turn)',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per search; the best time is reported')
+
+    def handle(self, *args, **options):
+        if not supported():
+            raise CommandError('This database has no invoice search index')
+
+        timings = {}
+        for size in options['sizes']:
+            results = {}
+            with rolled_back():
+                with timed(results, 'seed'):
+                    seed_invoices(size, batch_size=10000)
+                with timed(results, 'index'):
+                    invoice_search.rebuild()
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                self.stdout.write(
+                    f"{size} invoices: seeded in {results['seed'] / 1000:.1f}s, "
+                    f"indexed in {results['index'] / 1000:.1f}s"
+                )
+                invoices = Invoice.objects.select_related('task', 'task__client')
+                for label, text in SEARCHES:
+                    legacy = invoices.filter(invoice_search.legacy_filter(text)).order_by('-created_at')
+                    timings[size, label] = (
+                        best_page_time(legacy, options['repeat']),
+                        best_page_time(invoice_search.search(invoices, text), options['repeat']),
+                    )
+
+        header = ''.join(f'{size:>23}' for size in options['sizes'])
+        self.stdout.write(f"\n{'search':<16} {'':<10}{header}")
+        for label, text in SEARCHES:
+            for i, method in enumerate(('icontains', 'index')):
+                cells = ''.join(
+                    f'{timings[size, label][i][0]:11.1f} ms {timings[size, label][i][1]:8d}'
+                    for size in options['sizes']
+                )
+                self.stdout.write(f"{label if i == 0 else '':<16} {method:<10}{cells}")
+        self.stdout.write('(milliseconds for the count and first page of 10, then the number of matches)')
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+
+from accounts import list_counts
+from accounts.benchmarks import best_call_time, rolled_back, seed_invoices, timed
+from accounts.models import Task
+from accounts.pagination import COUNT_LIMIT, PER_PAGE, approximate_count, cursor_for, paginate
+
+ORDERING = ('-created_at', 'id')
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and cursor pagination of the task list at increasing page depths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help='Tasks (each with an invoice) to seed')
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 10000, 40000],
+            help='Page numbers to load',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per page; the best time is reported')
+
+    def handle(self, *args, **options):
+        results = {}
+        with rolled_back():
+            with timed(results, 'seed'):
+                seed_invoices(options['rows'], batch_size=10000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Seeded {options['rows']} tasks in {results['seed'] / 1000:.1f}s\n")
+
+            tasks = Task.objects.select_related('allocation', 'created_by', 'client').order_by(*ORDERING)
+            repeat = options['repeat']
+            self.stdout.write(f"{'page':>8} {'offset ms':>10} {'cursor ms':>10}")
+            for number in options['pages']:
+                offset = (number - 1) * PER_PAGE
+                if offset >= options['rows']:
+                    break
+                # What the views did: the page by OFFSET, plus the paginator's COUNT
+                offset_ms = best_call_time(lambda: list(Paginator(tasks, PER_PAGE).page(number)), repeat)
+                # A cursor as the previous page's Next link would carry it
+                cursor = cursor_for(tasks[offset - 1], ORDERING) if offset else None
+                cursor_ms = best_call_time(lambda: list(paginate(tasks, cursor)), repeat)
+                self.stdout.write(f'{number:8d} {offset_ms:10.1f} {cursor_ms:10.1f}')
+
+            exact_ms = best_call_time(lambda: tasks.count(), repeat)
+            capped_ms = best_call_time(lambda: approximate_count(tasks), repeat)
+            count = list_counts.counter('tasks', {})
+            count(tasks)
+            cached_ms = best_call_time(lambda: count(tasks), repeat)
+            self.stdout.write(
+                f"\nTotal: exact COUNT {exact_ms:.1f} ms, capped at {COUNT_LIMIT} {capped_ms:.1f} ms, "
+                f"cached {cached_ms:.2f} ms"
+            )
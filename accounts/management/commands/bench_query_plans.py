@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from accounts import dates
+from accounts.benchmarks import best_time, rolled_back, seed_invoices, timed
+from accounts.models import Invoice, Task, User
+
+
+def hot_queries(today):
+    """(label, view, queryset) for the Task/Invoice filters the views run most"""
+    expert = User.objects.filter(username='bench_expert_0').first()
+    return [
+        ('task list', 'task_management', Task.objects.order_by('-created_at')[:25]),
+        ('task list by status', 'task_management', Task.objects.filter(status='Pending').order_by('-created_at')[:25]),
+        ('calendar', 'calendar_simple',
+         Task.objects.filter(dates.in_month('deadline', today.year, today.month)).order_by('deadline')),
+        ('expert upcoming tasks', 'admin_dashboard', Task.objects.filter(
+            dates.in_range('deadline', today, today + timedelta(days=7)),
+            allocation=expert, status__in=['InProgress', 'Pending'],
+        )),
+        ('completed tasks this month', 'admin_dashboard',
+         Task.objects.filter(dates.in_month('deadline', today.year, today.month), status='Completed')),
+        ('invoice list', 'invoice_management', Invoice.objects.order_by('-created_at')[:25]),
+        ('invoice list by status', 'invoice_management',
+         Invoice.objects.filter(payment_status='Pending').order_by('-created_at')[:25]),
+        ('payments this month', 'admin_dashboard',
+         Invoice.objects.filter(dates.in_month('payment_date', today.year, today.month), payment_status='Completed')),
+        ('yearly revenue', 'expert_payments',
+         Invoice.objects.filter(dates.in_year('payment_date', today.year), amount_paid__gt=0)),
+        ('revenue by currency', 'admin_dashboard',
+         Invoice.objects.values('currency', 'payment_status').annotate(count=Count('id')).order_by()),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Show EXPLAIN plans and timings of the hot Task/Invoice queries with and without their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Tasks (each with an invoice) to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the best time is reported')
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+
+    def handle(self, *args, **options):
+        today = dates.business_today()
+        index_names = [index.name for model in (Task, Invoice) for index in model._meta.indexes]
+        results = {}
+
+        with rolled_back():
+            with timed(results, 'seed'):
+                seed_invoices(options['rows'], batch_size=10000)
+            self.stdout.write(f"Seeded {options['rows']} tasks and invoices in {results['seed'] / 1000:.1f}s")
+
+            with rolled_back():
+                with connection.cursor() as cursor:
+                    for name in index_names:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+                before = self.measure(today, options['repeat'])
+            after = self.measure(today, options['repeat'])
+
+        self.stdout.write(f"\n{'query':<30} {'view':<20} {'before ms':>10} {'after ms':>10} {'speed-up':>9}")
+        for label, view, before_ms, before_plan in before:
+            after_ms, after_plan = next((ms, plan) for name, _, ms, plan in after if name == label)
+            speedup = before_ms / after_ms if after_ms else float('inf')
+            self.stdout.write(f'{label:<30} {view:<20} {before_ms:10.1f} {after_ms:10.1f} {speedup:8.1f}x')
+            if options['plans'] or before_plan != after_plan:
+                self.stdout.write(self.indent('before', before_plan))
+                self.stdout.write(self.indent('after', after_plan))
+
+    def measure(self, today, repeat):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        measured = []
+        for label, view, queryset in hot_queries(today):
+            measured.append((label, view, best_time(queryset, repeat), queryset.explain()))
+        return measured
+
+    def indent(self, label, plan):
+        lines = plan.splitlines()
+        return '\n'.join(f'    {label + ":" if i == 0 else "":<8}{line}' for i, line in enumerate(lines))
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts import dates, fx
+from accounts.benchmarks import rolled_back, seed_invoices, timed
+from accounts.dashboard_metrics import revenue_totals
+from accounts.models import ExchangeRate, Invoice
+
+COMPARED_KEYS = [
+    'total_payments_today',
+    'total_payment_received',
+    'completed_payments_inr',
+    'partial_payments_inr',
+    'total_payment_pending',
+    'received_invoices_count',
+    'pending_invoices_count',
+]
+
+
+def python_revenue_totals(today, rates):
+    """The per-row Python loops admin_dashboard used before revenue_totals()"""
+    totals = dict.fromkeys(COMPARED_KEYS, 0)
+    for invoice in Invoice.objects.filter(dates.on_day('payment_date', today), payment_status='Completed'):
+        totals['total_payments_today'] += float(invoice.amount_paid) * rates.get(invoice.currency, 1.0)
+
+    all_invoices = Invoice.objects.all()
+    for invoice in all_invoices:
+        if invoice.amount_paid > 0:
+            amount_paid_inr = float(invoice.amount_paid) * rates.get(invoice.currency, 1.0)
+            totals['total_payment_received'] += amount_paid_inr
+            if invoice.amount_paid >= invoice.amount_due:
+                totals['completed_payments_inr'] += amount_paid_inr
+            else:
+                totals['partial_payments_inr'] += amount_paid_inr
+
+    for currency_code, currency_name in Invoice.CURRENCY_CHOICES:
+        for invoice in all_invoices.filter(currency=currency_code):
+            float(invoice.amount_paid)
+            float(invoice.amount_due)
+
+    pending_invoices = all_invoices.exclude(payment_status='Completed')
+    for invoice in pending_invoices:
+        balance = invoice.amount_due - invoice.amount_paid
+        if balance > 0:
+            totals['total_payment_pending'] += float(balance) * rates.get(invoice.currency, 1.0)
+    totals['received_invoices_count'] = all_invoices.filter(payment_status='Completed').count()
+    totals['pending_invoices_count'] = pending_invoices.count()
+    return totals
+
+
+class Command(BaseCommand):
+    help = 'Compare the Python-loop and SQL-aggregate dashboard revenue totals on seeded invoices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=100000, help='Invoices to seed (rolled back afterwards)')
+
+    def handle(self, *args, **options):
+        today = dates.business_today()
+        results = {}
+
+        with rolled_back():
+            with timed(results, 'seed'):
+                seed_invoices(options['invoices'])
+            rates = fx.get_rates()
+            # Without rate history both paths convert at the same rates
+            ExchangeRate.objects.all().delete()
+
+            with timed(results, 'python'), CaptureQueriesContext(connection) as python_queries:
+                old = python_revenue_totals(today, rates)
+            with timed(results, 'sql'), CaptureQueriesContext(connection) as sql_queries:
+                new = revenue_totals(today, rates)
+
+        self.stdout.write(f"Seeded {options['invoices']} invoices in {results['seed']:.0f} ms")
+        self.stdout.write(f"Python loops:   {results['python']:9.1f} ms, {len(python_queries)} queries")
+        self.stdout.write(f"SQL aggregates: {results['sql']:9.1f} ms, {len(sql_queries)} queries")
+
+        mismatches = [
+            key for key in COMPARED_KEYS
+            if abs(float(old[key]) - float(new[key])) > max(0.01, abs(float(old[key])) * 1e-6)
+        ]
+        for key in COMPARED_KEYS:
+            self.stdout.write(f'  {key}: {old[key]:.2f} / {new[key]:.2f}')
+        if mismatches:
+            raise CommandError(f"Totals differ: {', '.join(mismatches)}")
@@ -0,0 +1,197 @@
+import json
+import multiprocessing
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from accounts import dashboard_metrics, dates
+from accounts.benchmarks import get_bench_user, scratch_database
+from accounts.models import Invoice, Task, User
+from accounts.views import task_create, update_payment
+
+CONTENTION_MODULE_CODE = 'CONTENTION'
+
+# Stock Django/SQLite behaviour: rollback journal, deferred transactions,
+# sqlite3's default 5 second busy timeout
+DEFAULT_PROFILE = {
+    'journal_mode': 'DELETE',
+    'pragmas': {'busy_timeout': 5000, 'synchronous': 'FULL'},
+    'transaction_mode': None,
+}
+
+
+def tuned_profile():
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    return {
+        'journal_mode': pragmas.pop('journal_mode', 'WAL'),
+        'pragmas': pragmas,
+        'transaction_mode': settings.DATABASES['default']['OPTIONS'].get('transaction_mode'),
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def is_lock_error(message):
+    return 'locked' in message or 'busy' in message
+
+
+def run_worker(role, profile, seconds, invoice_ids, client_id, admin_id, results):
+    """Body of one benchmark process: hammer the write views or the dashboard reads until time is up"""
+    # Forked from the parent: configure this process's connection before it opens
+    settings.SQLITE_PRAGMAS = profile['pragmas']
+    connection.settings_dict['OPTIONS']['transaction_mode'] = profile['transaction_mode']
+    counts = {'ok': 0, 'locked': 0, 'failed': 0, 'latencies': []}
+    factory = RequestFactory()
+    admin = User.objects.get(id=admin_id)
+    rng = random.Random()
+
+    def record(started, ok, message=''):
+        counts['latencies'].append((time.perf_counter() - started) * 1000)
+        if ok:
+            counts['ok'] += 1
+        elif is_lock_error(message):
+            counts['locked'] += 1
+        else:
+            counts['failed'] += 1
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        if role == 'writer':
+            if rng.random() < 0.5:
+                request = factory.post('/accounts/admin/tasks/create/', {
+                    'client': client_id,
+                    'module_code': CONTENTION_MODULE_CODE,
+                    'module_name': 'SQLite contention benchmark',
+                    'word_count': rng.randint(500, 5000),
+                    'quoted_price': rng.randint(50, 2000),
+                    'deadline': (timezone.now() + timezone.timedelta(days=rng.randint(1, 30))).isoformat(),
+                }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                view, args = task_create, ()
+            else:
+                request = factory.post('/accounts/admin/invoices/payment/', {
+                    'amount_paid': rng.randint(0, 50),
+                    'payment_status': 'Partial',
+                }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                view, args = update_payment, (rng.choice(invoice_ids),)
+            request.user = admin
+            try:
+                payload = json.loads(view(request, *args).content)
+                record(started, payload.get('success'), payload.get('message', ''))
+            except OperationalError as e:
+                record(started, False, str(e))
+        else:
+            try:
+                list(Task.objects.select_related('client').order_by('-created_at')[:25])
+                dashboard_metrics.task_counters(dates.business_today())
+                record(started, True)
+            except OperationalError as e:
+                record(started, False, str(e))
+    connections.close_all()
+    results.put((role, counts))
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent writer and reader processes against a temporary copy of the SQLite database '
+        'and report throughput and lock errors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Processes posting to task_create/update_payment')
+        parser.add_argument(
+            '--readers', type=int, default=4, help='Processes running the task list and dashboard counters',
+        )
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--invoices', type=int, default=50, help='Invoices the writers update payments on')
+        parser.add_argument(
+            '--profile', choices=['default', 'tuned', 'both'], default='both',
+            help='default: rollback journal and deferred transactions; tuned: SQLITE_PRAGMAS and transaction_mode',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark only applies to SQLite databases')
+        # Writes go through the real views (task codes, invoice numbers) and the
+        # journal mode is switched per profile, so none of it touches the live file
+        with scratch_database():
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        client = get_bench_user('bench_client', 'client')
+        admin = get_bench_user('bench_admin', 'admin')
+        invoice_ids = []
+        with transaction.atomic():
+            for _ in range(options['invoices']):
+                task = Task.objects.create(
+                    client=client,
+                    module_code=CONTENTION_MODULE_CODE,
+                    module_name='SQLite contention benchmark',
+                    word_count=1000,
+                    quoted_price=Decimal('100'),
+                    deadline=timezone.now(),
+                    created_by=admin,
+                )
+                invoice_ids.append(Invoice.objects.create(task=task, amount_due=Decimal('100')).id)
+
+        profiles = ['default', 'tuned'] if options['profile'] == 'both' else [options['profile']]
+        for name in profiles:
+            profile = DEFAULT_PROFILE if name == 'default' else tuned_profile()
+            self.run_profile(name, profile, options, invoice_ids, client.id, admin.id)
+
+    def set_journal_mode(self, mode):
+        # Only takes effect while no other connection is open
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {mode}')
+            return cursor.fetchone()[0]
+
+    def run_profile(self, name, profile, options, invoice_ids, client_id, admin_id):
+        journal_mode = self.set_journal_mode(profile['journal_mode'])
+        # Children must open their own connections, not share the parent's
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        roles = ['writer'] * options['writers'] + ['reader'] * options['readers']
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(role, profile, options['seconds'], invoice_ids, client_id, admin_id, results),
+            )
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        totals = {
+            role: {'ok': 0, 'locked': 0, 'failed': 0, 'latencies': []} for role in ('writer', 'reader')
+        }
+        for _ in processes:
+            role, counts = results.get()
+            for key in ('ok', 'locked', 'failed'):
+                totals[role][key] += counts[key]
+            totals[role]['latencies'].extend(counts['latencies'])
+        for process in processes:
+            process.join()
+
+        self.stdout.write(
+            f"\n{name}: journal_mode={journal_mode}, transaction_mode={profile['transaction_mode'] or 'DEFERRED'}, "
+            f"{options['writers']} writers, {options['readers']} readers, {options['seconds']:g}s"
+        )
+        for role, counts in totals.items():
+            self.stdout.write(
+                f"  {role + 's':<8} {counts['ok'] / options['seconds']:8.1f} ok/s  "
+                f"{counts['locked']:5d} lock errors  {counts['failed']:5d} other errors  "
+                f"p50 {percentile(counts['latencies'], 0.5):7.1f} ms  "
+                f"p99 {percentile(counts['latencies'], 0.99):7.1f} ms"
+            )
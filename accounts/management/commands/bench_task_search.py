@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts import task_search
+from accounts.benchmarks import best_page_time, rolled_back, seed_tasks, timed
+from accounts.models import Task
+from accounts.search_index import supported
+
+# (label, what a user types) -- benchmark tasks are coded BENCH<n>, with
+# module codes M100-M999 and names "Benchmark module <1-5000>"
+SEARCHES = [
+    ('task code', 'BENCH4242'),
+    ('code prefix', 'BENCH424'),
+    ('module code', 'M512'),
+    ('module name words', 'module 4242'),
+    ('client username', 'bench_client'),
+    ('no match', 'zzzz'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Time the task_management search box with icontains filters and with the search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help='Tasks to seed (rolled back afterwards)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per search; the best time is reported')
+
+    def handle(self, *args, **options):
+        if not supported():
+            raise CommandError('This database has no task search index')
+        results = {}
+        with rolled_back():
+            with timed(results, 'seed'):
+                seed_tasks(options['rows'], batch_size=10000)
+            with timed(results, 'index'):
+                task_search.rebuild()
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(
+                f"Seeded {options['rows']} tasks in {results['seed'] / 1000:.1f}s, "
+                f"indexed them in {results['index'] / 1000:.1f}s\n"
+            )
+
+            tasks = Task.objects.select_related('allocation', 'created_by', 'client')
+            self.stdout.write(f"{'search':<20} {'query':<14} {'icontains':>18} {'index':>18} {'speed-up':>9}")
+            for label, text in SEARCHES:
+                legacy = tasks.filter(task_search.legacy_filter(text)).order_by('-created_at')
+                indexed = task_search.search(tasks, text)
+                legacy_ms, legacy_count = best_page_time(legacy, options['repeat'])
+                indexed_ms, indexed_count = best_page_time(indexed, options['repeat'])
+                speedup = legacy_ms / indexed_ms if indexed_ms else float('inf')
+                self.stdout.write(
+                    f'{label:<20} {text:<14} {legacy_ms:8.1f} ms {legacy_count:6d} '
+                    f'{indexed_ms:8.1f} ms {indexed_count:6d} {speedup:8.1f}x'
+                )
+
+            # A write now also updates the index: show what that costs
+            task = Task.objects.filter(task_code__startswith='BENCH').first()
+            with timed(results, 'save'):
+                for _ in range(100):
+                    task.save()
+            self.stdout.write(f"\nTask.save() including the index update: {results['save'] / 100:.2f} ms")
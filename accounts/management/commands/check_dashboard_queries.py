@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from accounts import dashboard_cache, dashboard_metrics, dashboard_widgets, dates, fx, rollups
+from accounts.benchmarks import rolled_back, seed_invoices
+from accounts.models import User
+from accounts.views import admin_dashboard_widget
+
+# Task counters, user counters and revenue totals: one aggregate query each
+COUNTER_QUERY_BUDGET = 3
+# Payment and word charts: one range read over DailyMetrics, whatever the period
+CHART_QUERY_BUDGET = 1
+# Expert upcoming payments: one grouped query, however many experts there are
+EXPERT_PAYOUT_QUERY_BUDGET = 1
+EXPERT_COUNTS = (10, 200)
+
+
+class Command(BaseCommand):
+    help = 'Fail if the admin dashboard counters need more than their fixed number of queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=200, help='Invoices to seed (rolled back afterwards)')
+
+    def handle(self, *args, **options):
+        today = dates.business_today()
+        request = RequestFactory().get('/accounts/admin/dashboard/widgets/')
+        request.user = User(username='query_check', role='admin')
+
+        with rolled_back():
+            seed_invoices(options['invoices'])
+            rollups.rebuild_daily_metrics()
+            rates = fx.get_rates()
+            # Archive figures are cached until the next archive run, not per dashboard load
+            dashboard_metrics.task_counters(today)
+            dashboard_metrics.revenue_totals(today, rates)
+
+            with CaptureQueriesContext(connection) as counter_queries:
+                dashboard_metrics.task_counters(today)
+                dashboard_metrics.user_counters()
+                dashboard_metrics.revenue_totals(today, rates)
+
+            with CaptureQueriesContext(connection) as chart_queries:
+                rollups.daily_series(today - timedelta(days=364), today, rates)
+
+            widget_queries = {}
+            for name, widget in dashboard_widgets.WIDGETS.items():
+                with CaptureQueriesContext(connection) as queries:
+                    widget.compute(today, 7)
+                widget_queries[name] = len(queries)
+
+            dashboard_cache.bump_version()
+            cached_queries = 0
+            for name in dashboard_widgets.WIDGETS:
+                admin_dashboard_widget(request, name)
+                with CaptureQueriesContext(connection) as queries:
+                    admin_dashboard_widget(request, name)
+                cached_queries += len(queries)
+
+        payout_queries = []
+        for experts in EXPERT_COUNTS:
+            with rolled_back():
+                # Recent tasks, so plenty of deadlines fall in the coming week
+                seed_invoices(experts * 5, days=14, experts=experts)
+                with CaptureQueriesContext(connection) as queries:
+                    payouts = dashboard_widgets.expert_payouts(today, 7)['expert_payments']
+            payout_queries.append(queries)
+            self.stdout.write(
+                f'Expert payouts with {experts} experts: {len(queries)} queries, {len(payouts)} experts listed'
+            )
+
+        self.stdout.write(f'Counter queries: {len(counter_queries)} (budget {COUNTER_QUERY_BUDGET})')
+        self.stdout.write(f'365-day chart queries: {len(chart_queries)} (budget {CHART_QUERY_BUDGET})')
+        for name, count in widget_queries.items():
+            self.stdout.write(f'  {name} widget: {count} queries')
+        self.stdout.write(
+            f'Total admin dashboard queries: {sum(widget_queries.values())} uncached, {cached_queries} cached'
+        )
+        self.check_budget('Dashboard counters', counter_queries, COUNTER_QUERY_BUDGET)
+        self.check_budget('Dashboard charts', chart_queries, CHART_QUERY_BUDGET)
+        for queries in payout_queries:
+            self.check_budget('Expert payouts', queries, EXPERT_PAYOUT_QUERY_BUDGET)
+        if len({len(queries) for queries in payout_queries}) > 1:
+            raise CommandError('Expert payout queries grow with the number of experts')
+        self.stdout.write(self.style.SUCCESS('Query budget OK'))
+
+    def check_budget(self, label, queries, budget):
+        if len(queries) > budget:
+            for query in queries.captured_queries:
+                self.stderr.write(query['sql'])
+            raise CommandError(f'{label} exceeded their query budget')
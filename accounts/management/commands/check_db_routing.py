@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from accounts import views
+from accounts.benchmarks import get_bench_user
+from accounts.models import ExpertPayRate, Task
+from accounts.routers import REPORTS_DB_ALIAS, reporting, reports_db_configured
+
+# (label, view, path, view args, models the view may still read from the primary)
+REPORT_VIEWS = [
+    ('admin_dashboard', views.admin_dashboard, '/accounts/admin/dashboard/', (), ()),
+    ('kpis widget', views.admin_dashboard_widget, '/accounts/admin/dashboard/widgets/kpis/', ('kpis',), ()),
+    ('timeseries', views.dashboard_timeseries, '/accounts/admin/dashboard/timeseries/', (), ()),
+    ('calendar', views.calendar_simple, '/accounts/admin/calendar/', (), ()),
+    # get_or_create() reads through the write database, which is right: it may insert
+    ('expert_payments', views.expert_payments, '/accounts/admin/payments/', (), (ExpertPayRate,)),
+]
+
+
+class Command(BaseCommand):
+    help = 'Fail if the reporting views read from the primary database while a reports database is configured'
+
+    def handle(self, *args, **options):
+        if not reports_db_configured():
+            self.stdout.write(f"No '{REPORTS_DB_ALIAS}' database configured; every query uses '{DEFAULT_DB_ALIAS}'")
+            return
+
+        admin = get_bench_user('bench_admin', 'admin')
+        factory = RequestFactory()
+        failures = []
+        for label, view, path, args, primary_models in REPORT_VIEWS:
+            request = factory.get(path)
+            request.user = admin
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                    CaptureQueriesContext(connections[REPORTS_DB_ALIAS]) as replica:
+                try:
+                    view(request, *args)
+                except Exception as e:
+                    # Rendering problems are not routing problems
+                    self.stderr.write(f'{label}: {e!r}')
+            self.stdout.write(f'{label:<16} {len(replica):3d} on {REPORTS_DB_ALIAS}, {len(primary):3d} on {DEFAULT_DB_ALIAS}')
+            quote_name = connections[DEFAULT_DB_ALIAS].ops.quote_name
+            allowed = [quote_name(model._meta.db_table) for model in primary_models]
+            if any(not any(f'FROM {table}' in query['sql'] for table in allowed) for query in primary):
+                failures.append(label)
+
+        with reporting():
+            write_alias = router.db_for_write(Task)
+        if write_alias != DEFAULT_DB_ALIAS:
+            failures.append(f'writes inside reporting views go to {write_alias}')
+
+        if failures:
+            raise CommandError(f"Reads on '{DEFAULT_DB_ALIAS}': {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('Reporting views read from the reports database'))
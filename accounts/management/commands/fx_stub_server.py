@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from accounts.fx_stub_server import StubRateServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local stub of the exchange rate API with configurable latency and failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, in seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with HTTP 503')
+        parser.add_argument('--hang', action='store_true', help='Never answer, to test client timeouts')
+
+    def handle(self, *args, **options):
+        server = StubRateServer(
+            address=('127.0.0.1', options['port']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            failure_rate=options['failure_rate'],
+            hang=options['hang'],
+        )
+        self.stdout.write(f'Serving stub rates at {server.url} (set FX_HTTP_URL to use it), Ctrl+C to stop')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
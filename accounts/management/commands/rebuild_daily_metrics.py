@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from accounts.dates import business_today
+from accounts.rollups import rebuild_daily_metrics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the DailyMetrics rollup from tasks and invoices (backfill, or repair after bulk writes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD). Defaults to the earliest data.')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD). Defaults to the latest data.')
+        parser.add_argument('--days', type=int, help='Rebuild only the last N days, up to today')
+
+    def handle(self, *args, **options):
+        start = self.parse(options, 'start')
+        end = self.parse(options, 'end')
+        if options['days']:
+            end = business_today()
+            start = end - timedelta(days=options['days'] - 1)
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+
+        rows = rebuild_daily_metrics(start, end)
+        span = f"{start or 'beginning'} to {end or 'latest'}"
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily metric rows ({span})'))
+
+    def parse(self, options, name):
+        if not options[name]:
+            return None
+        value = parse_date(options[name])
+        if not value:
+            raise CommandError(f'Invalid --{name}: {options[name]}')
+        return value
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from accounts import invoice_search
+from accounts.search_index import supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the invoice search index from invoices, tasks and clients (repair after bulk writes)'
+
+    def handle(self, *args, **options):
+        if not supported():
+            self.stdout.write('This database has no search index; invoice search uses icontains filters')
+            return
+        rows = invoice_search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {rows} invoices'))
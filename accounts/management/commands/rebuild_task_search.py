@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from accounts import task_search
+from accounts.search_index import supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the task search index from the tasks table (repair after bulk writes)'
+
+    def handle(self, *args, **options):
+        if not supported():
+            self.stdout.write('This database has no search index; task search uses icontains filters')
+            return
+        rows = task_search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {rows} tasks'))
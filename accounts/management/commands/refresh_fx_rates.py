@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts import dates, fx, fx_providers
+from accounts.fx_providers import get_provider
+from accounts.models import ExchangeRate
+
+
+class Command(BaseCommand):
+    help = 'Fetch exchange rates from a provider and store them as the latest snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider',
+            help='Provider name (http, file, stub) or dotted class path. Defaults to FX_RATE_PROVIDER.',
+        )
+        parser.add_argument('--file', help='JSON rate file for the file provider')
+        parser.add_argument(
+            '--date',
+            help='Effective date (YYYY-MM-DD) of the rates, for backfilling history from a file. Defaults to today.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running and refresh every N seconds. Failed fetches are reported and retried next round.',
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {}
+        if options['file']:
+            kwargs['path'] = options['file']
+            options['provider'] = options['provider'] or 'file'
+
+        effective_date = None
+        if options['date']:
+            effective_date = parse_date(options['date'])
+            if not effective_date:
+                raise CommandError(f"Invalid --date: {options['date']}")
+
+        try:
+            provider = get_provider(options['provider'], **kwargs)
+        except Exception as e:
+            raise CommandError(f'Could not set up exchange rate provider: {e}')
+
+        if not options['interval']:
+            try:
+                self.refresh(provider, effective_date)
+            except Exception as e:
+                raise CommandError(f'Could not fetch exchange rates: {e}')
+            return
+
+        while True:
+            try:
+                self.refresh(provider, effective_date)
+            except Exception as e:
+                self.stderr.write(f'Could not fetch exchange rates: {e}')
+            self.stdout.write(f'Provider metrics: {fx_providers.metrics.snapshot()}')
+            time.sleep(options['interval'])
+
+    def refresh(self, provider, effective_date=None):
+        rates = provider.fetch()
+        fetched_at = timezone.now()
+        with transaction.atomic():
+            current = self.current_snapshot()
+            snapshot = ExchangeRate.objects.bulk_create([
+                ExchangeRate(
+                    base_currency=code,
+                    quote_currency='INR',
+                    rate=round(rate, 8),
+                    effective_date=effective_date or dates.business_date(fetched_at),
+                    fetched_at=fetched_at,
+                    source=provider.name,
+                )
+                for code, rate in rates.items()
+                if code != 'INR'
+            ])
+            if effective_date is not None and current is not None and effective_date < current[0]:
+                # Backfilled history must not become the rates used for current conversions
+                if self.current_snapshot() != current:
+                    raise CommandError(f'Backfilling {effective_date} replaced the current rates; nothing stored')
+                self.stdout.write(f'Current rates are still the snapshot effective {current[0]}')
+
+        for code, rate in sorted(rates.items()):
+            self.stdout.write(f'{code}/INR = {rate:.4f}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {len(snapshot)} rates from {provider.name} effective {snapshot[0].effective_date}'
+        ))
+
+    def current_snapshot(self):
+        """(effective_date, fetched_at) of the snapshot conversions use, or None"""
+        return fx.current_snapshot().values_list('effective_date', 'fetched_at').first()
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts import outbox
+from accounts.mail_dispatch import Dispatcher
+
+PURGE_INTERVAL = 60 * 60  # seconds between deletions of old sent emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox in batches over pooled SMTP connections, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Worker threads sending in parallel')
+        parser.add_argument('--batch-size', type=int, default=10, help='Emails a thread claims at a time')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when nothing is due')
+        parser.add_argument(
+            '--once', action='store_true', help='Exit once nothing is due instead of waiting for more',
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--concurrency and --batch-size must be at least 1')
+
+        self.verbosity = options['verbosity']
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self.work, args=(stop, options), name=f'email-worker-{number}', daemon=True,
+            )
+            for number in range(options['concurrency'])
+        ]
+        self.stdout.write(f'Sending queued emails with {len(threads)} threads, Ctrl+C to stop')
+        for thread in threads:
+            thread.start()
+
+        next_purge = time.monotonic()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if not options['once'] and time.monotonic() >= next_purge:
+                    purged = outbox.purge_sent()
+                    if purged:
+                        self.stdout.write(f'Deleted {purged} old sent emails')
+                    next_purge = time.monotonic() + PURGE_INTERVAL
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after the emails in hand...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            connections.close_all()
+        self.stdout.write(
+            f"{self.counts[outbox.SENT]} sent, {self.counts['retry']} to retry, "
+            f"{self.counts[outbox.DEAD]} dead-lettered"
+        )
+
+    def work(self, stop, options):
+        # One SMTP connection per thread, kept open while the queue is busy
+        dispatcher = Dispatcher()
+        try:
+            while not stop.is_set():
+                emails = outbox.claim(options['batch_size'])
+                if not emails:
+                    dispatcher.close()
+                    if options['once']:
+                        return
+                    stop.wait(options['poll_interval'])
+                    continue
+                timing = outbox.deliver(emails, dispatcher)
+                if timing is not None and self.verbosity >= 1:
+                    self.stdout.write(f'{threading.current_thread().name}: batch {timing}')
+                for email in emails:
+                    self.report(email)
+        finally:
+            dispatcher.close()
+            # Each thread has its own database connection
+            connections.close_all()
+
+    def report(self, email):
+        status = email.status
+        with self.lock:
+            self.counts['retry' if status == outbox.PENDING else status] += 1
+        label = f"#{email.pk} {email.kind} to {', '.join(email.recipients)}"
+        if status == outbox.SENT:
+            if self.verbosity >= 2:
+                self.stdout.write(f'Sent {label}')
+        elif status == outbox.PENDING:
+            self.stderr.write(f'Retrying {label} later: {email.last_error}')
+        else:
+            self.stderr.write(f'Dead-lettered {label}: {email.last_error}')
@@ -0,0 +1,47 @@
+from email import message_from_bytes
+
+from django.core.management.base import BaseCommand
+
+from accounts.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP server that accepts mail and prints it, for testing the email worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before accepting each message')
+        parser.add_argument(
+            '--handshake-latency', type=float, default=0.0, help='Seconds to wait before greeting each connection',
+        )
+        parser.add_argument(
+            '--failure-rate', type=float, default=0.0, help='Share of messages answered with a temporary 451 failure',
+        )
+        parser.add_argument(
+            '--reject', action='append', default=[], help='Recipient address to refuse with a permanent 550 (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(
+            address=('127.0.0.1', options['port']),
+            latency=options['latency'],
+            handshake_latency=options['handshake_latency'],
+            failure_rate=options['failure_rate'],
+            reject=options['reject'],
+            on_message=self.show,
+        )
+        self.stdout.write(
+            f'Accepting mail on 127.0.0.1:{sink.port} '
+            f'(set EMAIL_HOST=127.0.0.1 EMAIL_PORT={sink.port} EMAIL_USE_TLS=False), Ctrl+C to stop'
+        )
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server_close()
+        self.stdout.write(f'{len(sink.messages)} messages over {sink.connection_count} connections')
+
+    def show(self, sender, recipients, data):
+        message = message_from_bytes(data)
+        self.stdout.write(f"{sender} -> {', '.join(recipients)}: {message['Subject']}")
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from accounts import sequences
+from accounts.benchmarks import get_bench_user, scratch_database
+from accounts.models import Invoice, Task
+
+STRESS_MODULE_CODE = 'STRESS'
+
+
+class Command(BaseCommand):
+    help = (
+        'Create tasks and invoices from many threads at once, on a temporary copy of the SQLite database, '
+        'and fail on duplicate codes or failed saves'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--tasks', type=int, default=25, help='Tasks each thread creates one by one')
+        parser.add_argument('--block', type=int, default=50, help='Task codes and invoice numbers each thread also reserves as one block')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This test only runs on SQLite, against a temporary copy of the database')
+        # Reserved codes can't be handed back, so the live sequences are left alone
+        with scratch_database():
+            self.stress(options)
+
+    def stress(self, options):
+        client = get_bench_user('bench_client', 'client')
+        admin = get_bench_user('bench_admin', 'admin')
+        codes = []
+        numbers = []
+        errors = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(options['threads'])
+
+        def worker():
+            created = []
+            invoiced = []
+            try:
+                start_gate.wait()
+                for _ in range(options['tasks']):
+                    task = Task(
+                        client=client,
+                        module_code=STRESS_MODULE_CODE,
+                        module_name='Task code stress test',
+                        word_count=1000,
+                        quoted_price=Decimal('100'),
+                        deadline=timezone.now(),
+                        created_by=admin,
+                    )
+                    task.save()
+                    created.append(task.task_code)
+                    invoice = Invoice(task=task, amount_due=task.quoted_price, currency=task.currency)
+                    invoice.save()
+                    invoiced.append(invoice.invoice_number)
+                created.extend(sequences.task_codes(options['block']))
+                invoiced.extend(sequences.invoice_numbers(options['block']))
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            finally:
+                with lock:
+                    codes.extend(created)
+                    numbers.extend(invoiced)
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        stored = Task.objects.filter(module_code=STRESS_MODULE_CODE).count()
+
+        duplicates = [code for code, seen in Counter(codes + numbers).items() if seen > 1]
+        self.stdout.write(
+            f"{options['threads']} threads: {len(codes)} task codes ({stored} tasks saved) "
+            f"and {len(numbers)} invoice numbers in {elapsed:.2f}s"
+        )
+        for error in errors[:10]:
+            self.stderr.write(error)
+        if duplicates:
+            raise CommandError(f'Duplicate codes: {duplicates[:10]}')
+        if errors:
+            raise CommandError(f'{len(errors)} threads failed')
+        self.stdout.write(self.style.SUCCESS('No duplicate task codes or invoice numbers'))
@@ -8,10 +8,16 @@ class Migration(migrations.Migration):
         ('accounts', '0001_initial'),
     ]
 
+    # 0008_invoice_payment_receipt adds the same column on the other branch of
+    # 0009_merge and runs first on a new database, so only the state changes here
     operations = [
-        migrations.AddField(
-            model_name='invoice',
-            name='payment_receipt',
-            field=models.FileField(blank=True, null=True, upload_to='invoices/receipts/'),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='invoice',
+                    name='payment_receipt',
+                    field=models.FileField(blank=True, null=True, upload_to='invoices/receipts/'),
+                ),
+            ],
         ),
     ]
\ No newline at end of file
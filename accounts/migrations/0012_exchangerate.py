@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_remove_invoice_notes_remove_invoice_payment_receipt_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpertPayRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price_per_word', models.DecimalField(decimal_places=3, default=0.5, max_digits=6)),
+                ('currency', models.CharField(choices=[('INR', 'Indian Rupee (₹)'), ('USD', 'US Dollar ($)'), ('EUR', 'Euro (€)'), ('GBP', 'British Pound (£)')], default='INR', max_length=3)),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('expert', models.OneToOneField(limit_choices_to={'role': 'expert'}, on_delete=django.db.models.deletion.CASCADE, related_name='pay_rate', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_currency', models.CharField(choices=[('INR', 'Indian Rupee (₹)'), ('USD', 'US Dollar ($)'), ('EUR', 'Euro (€)'), ('GBP', 'British Pound (£)')], max_length=3)),
+                ('quote_currency', models.CharField(choices=[('INR', 'Indian Rupee (₹)'), ('USD', 'US Dollar ($)'), ('EUR', 'Euro (€)'), ('GBP', 'British Pound (£)')], default='INR', max_length=3)),
+                ('rate', models.DecimalField(decimal_places=8, help_text='Value of one unit of base currency in quote currency', max_digits=18)),
+                ('fetched_at', models.DateTimeField()),
+                ('source', models.CharField(max_length=50)),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['quote_currency', '-fetched_at'], name='fx_quote_fetched_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_effective_date(apps, schema_editor):
+    ExchangeRate = apps.get_model('accounts', 'ExchangeRate')
+    # The business date, which historical conversions match payment dates against
+    business_timezone = ZoneInfo(getattr(settings, 'BUSINESS_TIME_ZONE', settings.TIME_ZONE))
+    for rate in ExchangeRate.objects.all().only('id', 'fetched_at'):
+        rate.effective_date = timezone.localdate(rate.fetched_at, timezone=business_timezone)
+        rate.save(update_fields=['effective_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_exchangerate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exchangerate',
+            name='effective_date',
+            field=models.DateField(help_text='Date the rate applies to', null=True),
+        ),
+        migrations.RunPython(set_effective_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exchangerate',
+            name='effective_date',
+            field=models.DateField(help_text='Date the rate applies to'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangerate',
+            index=models.Index(fields=['base_currency', 'quote_currency', 'effective_date'], name='fx_pair_effective_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:09
+
+from collections import defaultdict
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+METRIC_FIELDS = ('words_created', 'tasks_created', 'tasks_completed', 'payments_received', 'amount_received')
+
+
+def backfill_daily_metrics(apps, schema_editor):
+    """Fill the new rollup from existing tasks and invoices
+
+    The signal handlers only apply changes to existing buckets, so an empty
+    rollup would show zeros and drift on the first edit. This is a frozen
+    copy of rollups.rebuild_daily_metrics() as of this migration, bucketing
+    by business date.
+    """
+    alias = schema_editor.connection.alias
+    Task = apps.get_model('accounts', 'Task')
+    Invoice = apps.get_model('accounts', 'Invoice')
+    DailyMetrics = apps.get_model('accounts', 'DailyMetrics')
+    business_timezone = ZoneInfo(getattr(settings, 'BUSINESS_TIME_ZONE', settings.TIME_ZONE))
+
+    def by_day(queryset, field):
+        return queryset.using(alias).annotate(
+            day=TruncDate(field, tzinfo=business_timezone),
+        ).values('day', 'currency').order_by()
+
+    buckets = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+    for row in by_day(Task.objects.all(), 'created_at').annotate(words=Sum('word_count'), count=Count('id')):
+        bucket = buckets[(row['day'], row['currency'])]
+        bucket['words_created'] += row['words'] or 0
+        bucket['tasks_created'] += row['count']
+    for row in by_day(Task.objects.filter(status='Completed'), 'deadline').annotate(count=Count('id')):
+        buckets[(row['day'], row['currency'])]['tasks_completed'] += row['count']
+    paid = Invoice.objects.filter(payment_status='Completed', payment_date__isnull=False)
+    for row in by_day(paid, 'payment_date').annotate(count=Count('id'), amount=Sum('amount_paid')):
+        bucket = buckets[(row['day'], row['currency'])]
+        bucket['payments_received'] += row['count']
+        bucket['amount_received'] += row['amount'] or 0
+
+    DailyMetrics.objects.using(alias).bulk_create([
+        DailyMetrics(date=day, currency=currency, **counters)
+        for (day, currency), counters in buckets.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_exchangerate_effective_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('currency', models.CharField(choices=[('INR', 'Indian Rupee (₹)'), ('USD', 'US Dollar ($)'), ('EUR', 'Euro (€)'), ('GBP', 'British Pound (£)')], default='INR', max_length=3)),
+                ('words_created', models.BigIntegerField(default=0, help_text='Words of tasks created on this date')),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0, help_text='Completed tasks by deadline date')),
+                ('payments_received', models.IntegerField(default=0, help_text='Completed invoices by payment date')),
+                ('amount_received', models.DecimalField(decimal_places=2, default=0, help_text='In the row currency', max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily metrics',
+                'ordering': ['date', 'currency'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailymetrics',
+            constraint=models.UniqueConstraint(fields=('date', 'currency'), name='daily_metrics_date_currency'),
+        ),
+        migrations.RunPython(backfill_daily_metrics, migrations.RunPython.noop),
+    ]
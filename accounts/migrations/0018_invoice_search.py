@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# Frozen copy of the invoice_search index as of this migration, so later
+# changes to accounts/invoice_search.py don't change what this migration creates
+SEARCH_TABLE = 'accounts_invoice_search'
+SOURCE = (
+    'FROM accounts_invoice i JOIN accounts_task t ON t.id = i.task_id '
+    'JOIN accounts_user u ON u.id = t.client_id'
+)
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+# (name, SQL expression, tsvector weight)
+COLUMNS = [
+    ('invoice_number', f"i.invoice_number || ' ' || ltrim(i.invoice_number, '{LETTERS}')", 'A'),
+    ('task_code', f"t.task_code || ' ' || ltrim(t.task_code, '{LETTERS}')", 'A'),
+    ('module_name', 't.module_name', 'B'),
+    ('client', "u.username || ' ' || u.first_name || ' ' || u.last_name", 'B'),
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the search table and index every existing invoice"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        names = ', '.join(name for name, *_ in COLUMNS)
+        values = ', '.join(f"coalesce({expression}, '')" for _, expression, _ in COLUMNS)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5({names}, tokenize = 'unicode61', prefix = '2 3 4')"
+        )
+        schema_editor.execute(f'INSERT INTO {SEARCH_TABLE} (rowid, {names}) SELECT i.id, {values} {SOURCE}')
+    elif vendor == 'postgresql':
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce({expression}, '')), '{weight}')"
+            for _, expression, weight in COLUMNS
+        )
+        schema_editor.execute(
+            f'CREATE TABLE {SEARCH_TABLE} ('
+            'invoice_id bigint PRIMARY KEY REFERENCES accounts_invoice (id) '
+            'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)'
+        )
+        schema_editor.execute(f'CREATE INDEX {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)')
+        schema_editor.execute(f'INSERT INTO {SEARCH_TABLE} (invoice_id, document) SELECT i.id, {document} {SOURCE}')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_task_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
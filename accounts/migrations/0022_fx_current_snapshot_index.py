@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_outbox_email'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='exchangerate',
+            name='fx_quote_fetched_idx',
+        ),
+        migrations.AddIndex(
+            model_name='exchangerate',
+            index=models.Index(fields=['quote_currency', '-effective_date', '-fetched_at'], name='fx_quote_current_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+from . import fx, sequences
 import os
 
 class User(AbstractUser):
@@ -12,6 +14,12 @@ class User(AbstractUser):
     
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='client')
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # User list (newest first, id breaks ties for cursor pagination)
+            models.Index(fields=['-date_joined', 'id'], name='user_joined_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.username} - {self.role}"
 
@@ -67,17 +75,22 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Task lists and recent activity (newest first), optionally by status;
+            # id breaks ties for cursor pagination
+            models.Index(fields=['-created_at', 'id'], name='task_created_idx'),
+            models.Index(fields=['status', '-created_at', 'id'], name='task_status_created_idx'),
+            # Calendar, due-tomorrow and per-year deadline ranges
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            # Expert workloads and upcoming payouts
+            models.Index(fields=['allocation', 'status', 'deadline'], name='task_alloc_status_dl_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.task_code:
-            # Generate task code: TD2001, TD2002, etc.
-            last_task = Task.objects.filter(task_code__startswith='TD').order_by('task_code').last()
-            if last_task:
-                last_number = int(last_task.task_code[2:])
-                new_number = last_number + 1
-            else:
-                new_number = 2001
-            self.task_code = f'TD{new_number}'
+            # Task codes come from the task_code sequence: TD2001, TD2002, etc.
+            self.task_code = sequences.task_codes()[0]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -130,6 +143,15 @@ def invoice_receipt_upload_path(instance, filename):
     # Upload to MEDIA_ROOT/invoices/invoice_number/receipts/filename
     return f'invoices/{instance.invoice_number}/receipts/{filename}'
 
+class InvoiceQuerySet(models.QuerySet):
+    def with_inr_amounts(self, rates=None):
+        """Annotate amount_due_inr, amount_paid_inr and balance_due_inr at current rates"""
+        return fx.with_inr_amounts(self, rates)
+
+    def with_paid_inr_at_payment_date(self, rates=None):
+        """Annotate amount_paid_inr converted at each invoice's payment date rate"""
+        return fx.with_paid_inr_at_payment_date(self, rates)
+
 class Invoice(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -165,8 +187,22 @@ class Invoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvoiceQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Invoice list (newest first), optionally by status; id breaks ties
+            # for cursor pagination
+            models.Index(fields=['-created_at', 'id'], name='invoice_created_idx'),
+            models.Index(fields=['payment_status', '-created_at', 'id'], name='invoice_status_created_idx'),
+            # Completed payments by date (dashboard, rollups, time series)
+            models.Index(fields=['payment_status', 'payment_date'], name='invoice_status_paid_idx'),
+            # Calendar and yearly revenue: payment date ranges with amount_paid > 0
+            models.Index(fields=['payment_date', 'amount_paid'], name='invoice_paid_amount_idx'),
+            # Revenue totals grouped by currency and status
+            models.Index(fields=['currency', 'payment_status'], name='invoice_currency_status_idx'),
+        ]
 
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.task.task_code if self.task else 'No Task'}"    
@@ -208,76 +244,17 @@ class Invoice(models.Model):
         return self.due_date < timezone.now() and not self.is_fully_paid
 
     def get_amount_in_inr(self, exchange_rates=None):
-        """Convert amount to INR using live exchange rates"""
-        if self.currency == 'INR':
-            return float(self.amount_due)
-        
-        if not exchange_rates:
-            # Fallback rates
-            exchange_rates = {
-                'USD_TO_INR': 82.0,
-                'EUR_TO_INR': 88.5,
-                'GBP_TO_INR': 101.2,
-            }
-        
-        # Convert to INR
-        if self.currency == 'USD':
-            return float(self.amount_due) * exchange_rates.get('USD_TO_INR', 82.0)
-        elif self.currency == 'EUR':
-            return float(self.amount_due) * exchange_rates.get('EUR_TO_INR', 88.5)
-        elif self.currency == 'GBP':
-            return float(self.amount_due) * exchange_rates.get('GBP_TO_INR', 101.2)
-        else:
-            return float(self.amount_due)
+        """Convert amount to INR (cached rates unless exchange_rates is given)"""
+        return fx.convert_to_inr(self.amount_due, self.currency, exchange_rates)
 
     def get_paid_amount_in_inr(self, exchange_rates=None):
-        """Convert paid amount to INR using live exchange rates"""
-        if self.currency == 'INR':
-            return float(self.amount_paid)
-        
-        if not exchange_rates:
-            exchange_rates = {
-                'USD_TO_INR': 82.0,
-                'EUR_TO_INR': 88.5,
-                'GBP_TO_INR': 101.2,
-            }
-        
-        # Convert to INR
-        if self.currency == 'USD':
-            return float(self.amount_paid) * exchange_rates.get('USD_TO_INR', 82.0)
-        elif self.currency == 'EUR':
-            return float(self.amount_paid) * exchange_rates.get('EUR_TO_INR', 88.5)
-        elif self.currency == 'GBP':
-            return float(self.amount_paid) * exchange_rates.get('GBP_TO_INR', 101.2)
-        else:
-            return float(self.amount_paid)
+        """Convert paid amount to INR (cached rates unless exchange_rates is given)"""
+        return fx.convert_to_inr(self.amount_paid, self.currency, exchange_rates)
 
     def save(self, *args, **kwargs):
-        # Generate invoice number if not exists
         if not self.invoice_number:
-            # Get current year and month
-            from datetime import datetime
-            now = datetime.now()
-            year_month = now.strftime('%Y%m')
-            
-            # Get the last invoice number for this month
-            last_invoice = Invoice.objects.filter(
-                invoice_number__startswith=f'INV{year_month}'
-            ).order_by('-invoice_number').first()
-            
-            if last_invoice:
-                # Extract the sequence number and increment
-                try:
-                    last_sequence = int(last_invoice.invoice_number[-4:])
-                    new_sequence = last_sequence + 1
-                except (ValueError, IndexError):
-                    new_sequence = 1
-            else:
-                # First invoice of the month
-                new_sequence = 1
-            
-            # Generate new invoice number: INV202412001, INV202412002, etc.
-            self.invoice_number = f'INV{year_month}{new_sequence:04d}'
+            # Numbers come from this month's invoice_number sequence: INV2024120001, ...
+            self.invoice_number = sequences.invoice_numbers()[0]
         
         super().save(*args, **kwargs)
 
@@ -292,3 +269,168 @@ class ExpertPayRate(models.Model):
 
     def __str__(self):
         return f"{self.expert.username} - {self.currency} {self.price_per_word}/word"
+
+class ExchangeRate(models.Model):
+    """Snapshot of an exchange rate fetched by the refresh_fx_rates command"""
+    base_currency = models.CharField(max_length=3, choices=Invoice.CURRENCY_CHOICES)
+    quote_currency = models.CharField(max_length=3, choices=Invoice.CURRENCY_CHOICES, default='INR')
+    rate = models.DecimalField(max_digits=18, decimal_places=8, help_text='Value of one unit of base currency in quote currency')
+    effective_date = models.DateField(help_text='Date the rate applies to')
+    fetched_at = models.DateTimeField()
+    source = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['quote_currency', '-effective_date', '-fetched_at'], name='fx_quote_current_idx'),
+            models.Index(fields=['base_currency', 'quote_currency', 'effective_date'], name='fx_pair_effective_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.base_currency}/{self.quote_currency} {self.rate} ({self.source})"
+
+class DailyMetrics(models.Model):
+    """Per-day, per-currency rollup behind the dashboard charts
+
+    Kept up to date by the Task/Invoice signal handlers in accounts.rollups;
+    rebuild with the rebuild_daily_metrics command after bulk changes.
+    """
+    date = models.DateField()
+    currency = models.CharField(max_length=3, choices=Invoice.CURRENCY_CHOICES, default='INR')
+    words_created = models.BigIntegerField(default=0, help_text='Words of tasks created on this date')
+    tasks_created = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0, help_text='Completed tasks by deadline date')
+    payments_received = models.IntegerField(default=0, help_text='Completed invoices by payment date')
+    amount_received = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text='In the row currency')
+
+    class Meta:
+        ordering = ['date', 'currency']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'currency'], name='daily_metrics_date_currency'),
+        ]
+        verbose_name_plural = 'Daily metrics'
+
+    def __str__(self):
+        return f"{self.date} {self.currency}"
+
+class Sequence(models.Model):
+    """Named counter handed out by accounts.sequences (task codes, invoice numbers)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0, help_text='Highest value handed out so far')
+
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
+
+class ArchivedTask(models.Model):
+    """A completed, fully paid Task moved out of the hot tables by archive_completed_tasks
+
+    Keeps the task's id, code and timestamps. Reports read it for ranges
+    older than the archive horizon (see accounts.archive).
+    """
+    task_code = models.CharField(max_length=20, unique=True)
+    client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    module_code = models.CharField(max_length=50)
+    module_name = models.CharField(max_length=200)
+    word_count = models.PositiveIntegerField()
+    additional_words = models.PositiveIntegerField(default=0)
+    quoted_price = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, choices=Task.CURRENCY_CHOICES, default='INR')
+    deadline = models.DateTimeField()
+    allocation = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, default='Completed')
+    notes = models.TextField(blank=True, null=True)
+    attachments = models.FileField(upload_to=task_attachment_upload_path, blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Word series and rollup rebuilds by creation date
+            models.Index(fields=['created_at'], name='archived_task_created_idx'),
+            # Calendar months and expert payouts by deadline
+            models.Index(fields=['deadline'], name='archived_task_deadline_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_code} - {self.module_name} (archived)"
+
+class ArchivedInvoice(models.Model):
+    """The paid Invoice of an ArchivedTask"""
+    task = models.OneToOneField(ArchivedTask, on_delete=models.CASCADE, related_name='invoice')
+    invoice_number = models.CharField(max_length=20, unique=True)
+    amount_due = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    currency = models.CharField(max_length=3, choices=Invoice.CURRENCY_CHOICES, default='INR')
+    due_date = models.DateTimeField(null=True, blank=True)
+    payment_status = models.CharField(max_length=20, choices=Invoice.PAYMENT_STATUS_CHOICES, default='Completed')
+    payment_date = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = InvoiceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Payment series, calendar months and yearly revenue
+            models.Index(fields=['payment_date'], name='archived_invoice_paid_idx'),
+        ]
+
+    def __str__(self):
+        return f"Invoice {self.invoice_number} (archived)"
+
+class ArchivedTaskAttachment(models.Model):
+    """Metadata of an ArchivedTask's attachment; the file stays where it was uploaded"""
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='task_attachments')
+    file = models.FileField(upload_to=task_attachment_upload_path)
+    file_name = models.CharField(max_length=255)
+    file_size = models.PositiveIntegerField()
+    uploaded_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['uploaded_at']
+
+    def __str__(self):
+        return f"{self.task.task_code} - {self.file_name} (archived)"
+
+class OutboxEmail(models.Model):
+    """Email waiting for the run_email_worker command (see accounts.outbox)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    kind = models.CharField(max_length=50, help_text='What the email is for, e.g. invoice or password_reset')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.TextField(help_text='Recipient addresses, one per line')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text='Dead-lettered if still unsent by then')
+    claimed_by = models.CharField(max_length=64, blank=True, help_text='Worker holding the lease')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.recipients[0] if self.recipients else '?'} ({self.status})"
+
+    @property
+    def recipients(self):
+        return self.to.split()
@@ -0,0 +1,174 @@
+"""
+Durable outbox for outgoing email.
+
+Views queue email with ``enqueue`` instead of talking to SMTP inside the
+request. The OutboxEmail row is written in the caller's transaction, so an
+email exists exactly when the change that caused it commits, and a rolled
+back request sends nothing. The run_email_worker command delivers it.
+
+Workers claim due rows with a lease (``claimed_by``/``claimed_until``) taken
+by a conditional UPDATE, so any number of worker threads and processes can
+share the queue, and the rows of a worker that dies become due again when
+its lease runs out. Each claimed batch goes out over one pooled SMTP
+connection (see mail_dispatch). Delivery is at least once: a worker that
+outlives its lease may send an email another worker also sends.
+
+Failed sends are retried with exponential backoff and jitter. An email is
+dead-lettered (status 'dead') when the server rejects it permanently (5xx
+for the message or every recipient), after EMAIL_OUTBOX_MAX_ATTEMPTS
+failures, or when it is still unsent at its ``expires_at``. ``requeue``
+gives dead emails another round, e.g. from the admin.
+"""
+import os
+import random
+import smtplib
+import socket
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+PENDING, SENT, DEAD = 'pending', 'sent', 'dead'
+
+
+def max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+
+
+def lease_seconds():
+    return getattr(settings, 'EMAIL_OUTBOX_LEASE', 5 * 60)
+
+
+def enqueue(kind, subject, body, to, html_body='', from_email=None, expires_in=None):
+    """Queue an email for the worker; it is only sent if the current transaction commits
+
+    ``to`` is an address or a list of them. ``expires_in`` (seconds) drops
+    emails that are useless when late, like one-time passwords.
+    """
+    recipients = [to] if isinstance(to, str) else list(to)
+    return OutboxEmail.objects.create(
+        kind=kind,
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to='\n'.join(recipients),
+        expires_at=timezone.now() + timedelta(seconds=expires_in) if expires_in else None,
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying an email that has failed ``attempts`` times"""
+    base = getattr(settings, 'EMAIL_OUTBOX_BACKOFF', 30)
+    ceiling = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_MAX', 60 * 60)
+    delay = min(ceiling, base * 2 ** (attempts - 1))
+    # Half fixed, half random, so emails that failed together spread out
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_permanent(error):
+    """Whether retrying can't help: the server refused the message or every recipient"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500
+
+
+def _due(now):
+    return OutboxEmail.objects.filter(status=PENDING, next_attempt_at__lte=now).filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    )
+
+
+def claim(limit):
+    """Lease up to ``limit`` due emails to the caller, oldest due first"""
+    now = timezone.now()
+    ids = list(_due(now).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    worker = f'{socket.gethostname()[:30]}:{os.getpid()}:{uuid.uuid4().hex[:12]}'
+    # Re-checks the due condition, so rows another worker took meanwhile are skipped
+    _due(now).filter(id__in=ids).update(claimed_by=worker, claimed_until=now + timedelta(seconds=lease_seconds()))
+    return list(OutboxEmail.objects.filter(id__in=ids, claimed_by=worker).order_by('next_attempt_at', 'id'))
+
+
+def build_message(email, connection=None):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.recipients, connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def record_sent(email):
+    email.status, email.sent_at = SENT, timezone.now()
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status=SENT, sent_at=email.sent_at, attempts=email.attempts + 1, claimed_until=None, last_error='',
+    )
+
+
+def record_failure(email, error):
+    """Schedule a retry after ``error``, or dead-letter the email; returns its new status"""
+    attempts = email.attempts + 1
+    now = timezone.now()
+    if is_permanent(error) or attempts >= max_attempts():
+        status, next_attempt_at = DEAD, now
+    else:
+        status, next_attempt_at = PENDING, now + timedelta(seconds=backoff(attempts))
+    email.status, email.attempts, email.last_error = status, attempts, f'{type(error).__name__}: {error}'[:2000]
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status=status, attempts=attempts, next_attempt_at=next_attempt_at, claimed_until=None,
+        last_error=email.last_error,
+    )
+    return status
+
+
+def expire(email):
+    """Dead-letter a claimed email if it passed its ``expires_at``; returns whether it did"""
+    if email.expires_at is None or email.expires_at > timezone.now():
+        return False
+    email.status, email.last_error = DEAD, 'Expired before it could be sent'
+    OutboxEmail.objects.filter(pk=email.pk).update(status=DEAD, claimed_until=None, last_error=email.last_error)
+    return True
+
+
+def deliver(emails, dispatcher):
+    """Send claimed emails as one batch over ``dispatcher`` (see mail_dispatch) and record the outcomes
+
+    Returns the BatchTiming, or None if every email had expired.
+    """
+    emails = [email for email in emails if not expire(email)]
+    if not emails:
+        return None
+    errors, timing = dispatcher.send_batch([build_message(email) for email in emails])
+    for email, error in zip(emails, errors):
+        if error is None:
+            record_sent(email)
+        else:
+            record_failure(email, error)
+    return timing
+
+
+def requeue(queryset):
+    """Give unsent emails a fresh set of attempts, due now (expired ones stay expired)"""
+    return queryset.exclude(status=SENT).update(
+        status=PENDING, attempts=0, next_attempt_at=timezone.now(), claimed_until=None,
+    )
+
+
+def purge_sent(older_than=None):
+    """Delete sent emails older than ``older_than`` seconds (EMAIL_OUTBOX_KEEP_SENT by default)
+
+    Sent emails hold reset links and one-time passwords, so they are not
+    kept for long.
+    """
+    if older_than is None:
+        older_than = getattr(settings, 'EMAIL_OUTBOX_KEEP_SENT', 7 * 24 * 60 * 60)
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = OutboxEmail.objects.filter(status=SENT, sent_at__lt=cutoff).delete()
+    return deleted
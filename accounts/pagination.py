@@ -0,0 +1,218 @@
+"""
+Cursor (keyset) pagination for the task, invoice and user lists.
+
+OFFSET pagination reads and throws away every row before the page, so deep
+pages get slower as tables grow, and page numbers need a full COUNT first.
+A cursor instead records where the page ended -- the ordering values of its
+last row -- and the next page seeks straight there through the index:
+
+    created_at <= c AND (created_at < c OR id > i)  ORDER BY -created_at, id
+
+Cursors are signed and opaque to clients, so their format can change and
+they cannot be forged into arbitrary queries. Ranked search results are not
+in a keyset order, but they are capped (see search_index), so their cursors
+hold a plain offset.
+
+Totals are optional. By default they come from ``approximate_count``, a
+COUNT that stops at COUNT_LIMIT rows, so showing "10000+" costs the same on
+any table size; the list views cache it (see list_counts).
+"""
+from django.core import signing
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+
+from .search_index import is_ranked
+
+PER_PAGE = 10
+
+# Counts stop here and are shown as "10000+"
+COUNT_LIMIT = 10000
+
+CURSOR_SALT = 'accounts.pagination'
+
+# Cursor directions. LAST pages backwards from the end of the list.
+NEXT, PREVIOUS, LAST = 'n', 'p', 'l'
+
+
+def encode_cursor(data):
+    return signing.dumps(data, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """The cursor's data, or None for a missing, tampered or malformed cursor"""
+    if not cursor:
+        return None
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def cursor_for(row, ordering, direction=NEXT):
+    """Cursor for the page after (or, with PREVIOUS, before) ``row``"""
+    # Strings, so the cursor stays JSON; _seek parses them back
+    values = [row._meta.get_field(name).value_to_string(row) for name, _ in _parse_ordering(ordering)]
+    return encode_cursor({'d': direction, 'k': values})
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _reverse(ordering):
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+def _seek(model, ordering, values, forward):
+    """Q for the rows after (``forward``) or before the row with ``values``"""
+    fields = _parse_ordering(ordering)
+    values = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+
+    def lookup(name, descending, strict=True):
+        after = 'lt' if descending == forward else 'gt'
+        return f'{name}__{after}' if strict else f'{name}__{after}e'
+
+    # Row-value comparison spelled out: (a, b) after (x, y) is
+    # a after x OR (a = x AND b after y)
+    condition = Q()
+    for i in reversed(range(len(fields))):
+        name, descending = fields[i]
+        step = Q(**{lookup(name, descending): values[i]})
+        if i < len(fields) - 1:
+            step |= Q(**{name: values[i]}) & condition
+        condition = step
+    # Repeat the leading column as a plain range so the index can seek to it
+    name, descending = fields[0]
+    return Q(**{lookup(name, descending, strict=False): values[0]}) & condition
+
+
+class CursorPage:
+    """One page of a list; iterates like a Paginator page"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, last_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = last_cursor
+        self.total = None
+        self.total_exact = True
+        self.query_string = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _url(self, cursor=None):
+        params = [self.query_string] if self.query_string else []
+        if cursor:
+            params.append(f'cursor={cursor}')
+        return '?' + '&'.join(params)
+
+    # Links for the templates
+    def first_url(self):
+        return self._url()
+
+    def previous_url(self):
+        return self._url(self.previous_cursor)
+
+    def next_url(self):
+        return self._url(self.next_cursor)
+
+    def last_url(self):
+        return self._url(self.last_cursor) if self.last_cursor else None
+
+    def as_dict(self):
+        """Pagination fields for JSON responses"""
+        return {
+            'next_cursor': self.next_cursor,
+            'previous_cursor': self.previous_cursor,
+            'total': self.total,
+            'total_exact': self.total_exact,
+        }
+
+
+def paginate(queryset, cursor=None, ordering=('-created_at', 'id'), per_page=PER_PAGE):
+    """The page of ``queryset`` at ``cursor`` (the first page without one)
+
+    ``ordering`` must end in a unique field. Ranked search results keep
+    their own order and are paged by offset.
+    """
+    data = decode_cursor(cursor) or {}
+    if is_ranked(queryset):
+        return _offset_page(queryset, data.get('o', 0), per_page)
+
+    direction, values = data.get('d', NEXT), data.get('k')
+    forward = direction == NEXT
+    if values is not None and direction != LAST:
+        queryset = queryset.filter(_seek(queryset.model, ordering, values, forward))
+    queryset = queryset.order_by(*(ordering if forward else _reverse(ordering)))
+
+    rows = list(queryset[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    if forward:
+        has_next, has_previous = more, values is not None
+    else:
+        has_next, has_previous = direction != LAST, more
+    return CursorPage(
+        rows,
+        next_cursor=cursor_for(rows[-1], ordering) if rows and has_next else None,
+        previous_cursor=cursor_for(rows[0], ordering, PREVIOUS) if rows and has_previous else None,
+        last_cursor=encode_cursor({'d': LAST}) if has_next else None,
+    )
+
+
+def _offset_page(queryset, offset, per_page):
+    rows = list(queryset[offset:offset + per_page + 1])
+    return CursorPage(
+        rows[:per_page],
+        next_cursor=encode_cursor({'o': offset + per_page}) if len(rows) > per_page else None,
+        previous_cursor=encode_cursor({'o': max(0, offset - per_page)}) if offset else None,
+    )
+
+
+def approximate_count(queryset, limit=COUNT_LIMIT):
+    """(count, exact): rows in ``queryset``, counting no further than ``limit``"""
+    counted = queryset.order_by().values('pk')
+    try:
+        sql, params = counted.query.get_compiler(counted.db).as_sql()
+    except EmptyResultSet:
+        # e.g. queryset.none() for a search with no words in it
+        return 0, True
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM ({sql} LIMIT %s) counted', (*params, limit + 1))
+        count = cursor.fetchone()[0]
+    return min(count, limit), count <= limit
+
+
+def paginate_request(request, queryset, ordering=('-created_at', 'id'), per_page=PER_PAGE,
+                     count=approximate_count):
+    """Page ``queryset`` from the request's ``cursor`` parameter
+
+    Links on the page keep the request's other query parameters. The total
+    comes from ``count(queryset)``, which returns (total, exact), unless
+    ``count`` is None or the request passes count=0.
+    """
+    page = paginate(queryset, request.GET.get('cursor'), ordering, per_page)
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    page.query_string = params.urlencode()
+    if count is not None and request.GET.get('count') != '0':
+        page.total, page.total_exact = count(queryset)
+    return page
@@ -1,30 +1,10 @@
-import requests
+from accounts import fx
 from decimal import Decimal
 import json
 
 def get_exchange_rates():
-    """Get live exchange rates for currency conversion"""
-    try:
-        # Using exchangerate-api.com (free tier)
-        response = requests.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=5)
-        if response.status_code == 200:
-            rates = response.json()['rates']
-            return {
-                'USD_TO_INR': rates.get('INR', 82.0),
-                'EUR_TO_INR': rates.get('INR', 82.0) / rates.get('EUR', 0.85),
-                'GBP_TO_INR': rates.get('INR', 82.0) / rates.get('GBP', 0.73),
-                'last_updated': 'live'
-            }
-    except Exception as e:
-        print(f"Exchange rate API error: {e}")
-    
-    # Fallback rates if API fails
-    return {
-        'USD_TO_INR': 82.0,
-        'EUR_TO_INR': 88.5,
-        'GBP_TO_INR': 101.2,
-        'last_updated': 'fallback'
-    }
+    """Get exchange rates for currency conversion from the shared FX cache"""
+    return fx.get_exchange_rates()
 
 def convert_to_inr(amount, currency, exchange_rates):
     """Convert amount to INR based on currency"""
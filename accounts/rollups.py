@@ -0,0 +1,210 @@
+"""
+Incremental maintenance of the DailyMetrics rollup.
+
+Every task and invoice contributes a few counters to one or two
+(date, currency) buckets. When a row is saved the signal handlers subtract
+what it contributed before the change and add what it contributes now; when
+it is deleted they subtract its contribution. Bulk writes (``bulk_create``,
+``QuerySet.update``) skip signals, so run ``rebuild_daily_metrics`` after them.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils.dateparse import parse_datetime
+
+from . import dates, fx
+from .models import ArchivedInvoice, ArchivedTask, DailyMetrics, Invoice, Task
+
+METRIC_FIELDS = ('words_created', 'tasks_created', 'tasks_completed', 'payments_received', 'amount_received')
+
+# Fields each model's contribution depends on
+TRACKED_FIELDS = {
+    Task: ('created_at', 'currency', 'word_count', 'status', 'deadline'),
+    Invoice: ('currency', 'payment_status', 'payment_date', 'amount_paid'),
+}
+
+
+def _bucket_date(value):
+    """Business calendar date of a datetime, matching the TruncDate in rebuild_daily_metrics()"""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if isinstance(value, datetime):
+        return dates.business_date(value)
+    return value if isinstance(value, date) else None
+
+
+def _new_buckets():
+    return defaultdict(lambda: defaultdict(int))
+
+
+def task_contributions(values):
+    """Counters a task adds to each (date, currency) bucket"""
+    buckets = _new_buckets()
+    created = _bucket_date(values.get('created_at'))
+    if created:
+        bucket = buckets[(created, values['currency'])]
+        bucket['words_created'] += int(values['word_count'] or 0)
+        bucket['tasks_created'] += 1
+    deadline = _bucket_date(values.get('deadline'))
+    if values['status'] == 'Completed' and deadline:
+        buckets[(deadline, values['currency'])]['tasks_completed'] += 1
+    return buckets
+
+
+def invoice_contributions(values):
+    """Counters an invoice adds to each (date, currency) bucket"""
+    buckets = _new_buckets()
+    paid_on = _bucket_date(values.get('payment_date'))
+    if values['payment_status'] == 'Completed' and paid_on:
+        bucket = buckets[(paid_on, values['currency'])]
+        bucket['payments_received'] += 1
+        bucket['amount_received'] += Decimal(str(values['amount_paid'] or 0)).quantize(Decimal('0.01'))
+    return buckets
+
+
+CONTRIBUTIONS = {
+    Task: task_contributions,
+    Invoice: invoice_contributions,
+}
+
+
+def apply_delta(before, after):
+    """Add ``after - before`` to the affected DailyMetrics rows"""
+    for key in set(before) | set(after):
+        delta = {}
+        for field in METRIC_FIELDS:
+            change = after.get(key, {}).get(field, 0) - before.get(key, {}).get(field, 0)
+            if change:
+                delta[field] = change
+        if delta:
+            _add_to_bucket(key, delta)
+
+
+def _add_to_bucket(key, delta):
+    day, currency = key
+    updates = {field: F(field) + change for field, change in delta.items()}
+    rows = DailyMetrics.objects.filter(date=day, currency=currency)
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DailyMetrics.objects.create(date=day, currency=currency, **delta)
+    except IntegrityError:
+        # Another request created the bucket in the meantime
+        rows.update(**updates)
+
+
+def _current_values(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS[type(instance)]}
+
+
+def _stored_contributions(instance):
+    model = type(instance)
+    if instance.pk is None or instance._state.adding:
+        return {}
+    values = model._base_manager.filter(pk=instance.pk).values(*TRACKED_FIELDS[model]).first()
+    return CONTRIBUTIONS[model](values) if values else {}
+
+
+def _is_tracked_update(instance, update_fields):
+    return update_fields is None or bool(set(update_fields) & set(TRACKED_FIELDS[type(instance)]))
+
+
+def remember_contributions(sender, instance, update_fields=None, **kwargs):
+    """pre_save: record what the stored row contributes before it changes"""
+    if _is_tracked_update(instance, update_fields):
+        instance._daily_metrics_before = _stored_contributions(instance)
+
+
+def update_contributions(sender, instance, update_fields=None, **kwargs):
+    """post_save: move the row's contribution to its new buckets"""
+    if not _is_tracked_update(instance, update_fields):
+        return
+    before = instance.__dict__.pop('_daily_metrics_before', {})
+    apply_delta(before, CONTRIBUTIONS[sender](_current_values(instance)))
+
+
+def remove_contributions(sender, instance, **kwargs):
+    """post_delete: take the row's contribution out of its buckets"""
+    apply_delta(CONTRIBUTIONS[sender](_current_values(instance)), {})
+
+
+def rebuild_daily_metrics(start=None, end=None):
+    """Recompute DailyMetrics from Task and Invoice for dates in [start, end]
+
+    Archived tasks and invoices count too, so history survives archiving.
+    Either bound may be omitted. Returns the number of rows written.
+    """
+    def in_range(queryset, field):
+        if start:
+            queryset = queryset.filter(**{f'{field}__gte': dates.start_of_day(start)})
+        if end:
+            queryset = queryset.filter(**{f'{field}__lt': dates.start_of_day(end + timedelta(days=1))})
+        day = TruncDate(field, tzinfo=dates.business_timezone())
+        return queryset.annotate(day=day).values('day', 'currency').order_by()
+
+    buckets = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+    for task_model, invoice_model in ((Task, Invoice), (ArchivedTask, ArchivedInvoice)):
+        tasks = in_range(task_model.objects.all(), 'created_at').annotate(words=Sum('word_count'), count=Count('id'))
+        for row in tasks:
+            bucket = buckets[(row['day'], row['currency'])]
+            bucket['words_created'] += row['words'] or 0
+            bucket['tasks_created'] += row['count']
+        for row in in_range(task_model.objects.filter(status='Completed'), 'deadline').annotate(count=Count('id')):
+            buckets[(row['day'], row['currency'])]['tasks_completed'] += row['count']
+        paid = invoice_model.objects.filter(payment_status='Completed', payment_date__isnull=False)
+        for row in in_range(paid, 'payment_date').annotate(count=Count('id'), amount=Sum('amount_paid')):
+            bucket = buckets[(row['day'], row['currency'])]
+            bucket['payments_received'] += row['count']
+            bucket['amount_received'] += row['amount'] or 0
+
+    with transaction.atomic():
+        stale = DailyMetrics.objects.all()
+        if start:
+            stale = stale.filter(date__gte=start)
+        if end:
+            stale = stale.filter(date__lte=end)
+        stale.delete()
+        DailyMetrics.objects.bulk_create([
+            DailyMetrics(date=day, currency=currency, **counters)
+            for (day, currency), counters in buckets.items()
+        ], batch_size=1000)
+    return len(buckets)
+
+
+def daily_series(start, end, rates=None):
+    """Chart figures for each day in [start, end], read from DailyMetrics in one query
+
+    Received amounts are converted to INR at the rate in effect on each day.
+    Days without activity are included with zeros.
+    """
+    amount_inr = ExpressionWrapper(
+        F('amount_received') * fx.historical_rate(on='date', rates=rates or fx.get_rates()),
+        output_field=fx.AMOUNT_FIELD,
+    )
+    rows = DailyMetrics.objects.filter(date__range=[start, end]).values('date').annotate(
+        words=Sum('words_created'),
+        tasks_created=Sum('tasks_created'),
+        tasks_completed=Sum('tasks_completed'),
+        payments=Sum('payments_received'),
+        amount_inr=Sum(amount_inr),
+    ).order_by('date')
+    by_date = {row['date']: row for row in rows}
+
+    series = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = by_date.get(day, {})
+        series.append({
+            'date': day,
+            'words': row.get('words') or 0,
+            'tasks_created': row.get('tasks_created') or 0,
+            'tasks_completed': row.get('tasks_completed') or 0,
+            'payments': row.get('payments') or 0,
+            'amount_inr': float(row.get('amount_inr') or 0),
+        })
+    return series
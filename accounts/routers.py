@@ -0,0 +1,67 @@
+"""
+Send the reporting views' reads to the ``reports`` database.
+
+Views wrapped in ``reports_view`` run their GET requests with reads routed to
+the ``reports`` alias (a read replica, see DB_REPLICA_HOST in settings).
+Everything else, and every write, uses ``default``. Without a ``reports``
+alias, nothing changes. The routing flag is a context variable, so it stays
+with the request in threaded and async servers alike.
+
+A replica lags the primary slightly, so only views that tolerate a few
+seconds of staleness belong here.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPORTS_DB_ALIAS = 'reports'
+
+_reporting = ContextVar('reporting', default=False)
+
+
+@contextmanager
+def reporting():
+    """Route reads inside the block to the reports database"""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def reports_view(view):
+    """Decorator: serve safe (GET/HEAD) requests of ``view`` from the reports database"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        with reporting():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def reports_db_configured():
+    return REPORTS_DB_ALIAS in connections.databases
+
+
+class ReportsRouter:
+    def db_for_read(self, model, **hints):
+        if _reporting.get() and reports_db_configured():
+            return REPORTS_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Always the primary, even for objects that were read from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPORTS_DB_ALIAS} or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        if db == REPORTS_DB_ALIAS:
+            return False
+        return None
@@ -0,0 +1,169 @@
+"""
+Denormalized full-text search documents, one row per indexed object.
+
+A ``SearchIndex`` keeps a side table of text columns collected from the
+object and the rows it joins to. On SQLite the table is an FTS5 table with
+2-4 character prefix indexes, ranked with weighted bm25. On PostgreSQL it
+holds one weighted tsvector per object under a GIN index, ranked with
+ts_rank. Other backends have no index, and ``search`` falls back to the
+caller's ``icontains`` filter.
+
+Each search word matches as a prefix, and every word must match. Lookups
+walk the index instead of scanning the joined tables, so latency depends on
+the number of matches, not on table size. Scoring every match costs more
+than the order is worth once a search matches more than
+``RANKED_MATCH_LIMIT`` rows (a busy client's name, say), so those are
+listed newest first instead.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+RANKED_MATCH_LIMIT = 5000
+# Extra select holding a result's score
+RANK = 'search_rank'
+
+WORD_RE = re.compile(r'[^\W_]+')
+# Stripped from codes like TD2001 / INV2024120001 to also index the bare number
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def number_terms(column):
+    """SQL for a code followed by its number: 'TD2001 2001'"""
+    return f"{column} || ' ' || ltrim({column}, '{LETTERS}')"
+
+
+def words(text):
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+def supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor in ('sqlite', 'postgresql')
+
+
+def is_ranked(queryset):
+    """Whether ``queryset`` is a search result ordered by score"""
+    return RANK in queryset.query.extra_select
+
+
+class SearchIndex:
+    """
+    ``columns`` is a list of (name, SQL expression, bm25 weight, tsvector
+    weight). The expressions read from ``source``, a FROM clause that
+    includes ``key`` (the indexed object's primary key column).
+    """
+
+    def __init__(self, table, model, key_column, key, source, columns):
+        self.table = table
+        self.model = model
+        self.key_column = key_column
+        self.key = key
+        self.source = source
+        self.columns = columns
+
+    def create(self, schema_editor):
+        """Create the search table (called from migrations)"""
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            names = ', '.join(name for name, *_ in self.columns)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                f"{names}, tokenize = 'unicode61', prefix = '2 3 4')"
+            )
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE TABLE {self.table} ('
+                f'{self.key_column} bigint PRIMARY KEY REFERENCES {self.model._meta.db_table} (id) '
+                'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)'
+            )
+            schema_editor.execute(f'CREATE INDEX {self.table}_document ON {self.table} USING gin (document)')
+
+    def drop(self, schema_editor):
+        if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+            schema_editor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def reindex(self, condition, params=(), using=DEFAULT_DB_ALIAS):
+        """Rewrite the search rows of the objects matching the SQL ``condition`` on ``source``"""
+        connection = connections[using]
+        source = f'{self.source} WHERE {condition}'
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN (SELECT {self.key} {source})', params)
+                names = ', '.join(name for name, *_ in self.columns)
+                values = ', '.join(f"coalesce({expression}, '')" for _, expression, *_ in self.columns)
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, {names}) SELECT {self.key}, {values} {source}', params,
+                )
+            elif connection.vendor == 'postgresql':
+                document = ' || '.join(
+                    f"setweight(to_tsvector('simple', coalesce({expression}, '')), '{weight}')"
+                    for _, expression, _, weight in self.columns
+                )
+                cursor.execute(
+                    f'INSERT INTO {self.table} ({self.key_column}, document) SELECT {self.key}, {document} {source} '
+                    f'ON CONFLICT ({self.key_column}) DO UPDATE SET document = excluded.document',
+                    params,
+                )
+            return cursor.rowcount
+
+    def remove(self, pk, using=DEFAULT_DB_ALIAS):
+        self.remove_many([pk], using)
+
+    def remove_many(self, pks, using=DEFAULT_DB_ALIAS):
+        """Drop the search rows of objects deleted without signals"""
+        connection = connections[using]
+        if connection.vendor == 'sqlite' and pks:
+            placeholders = ', '.join(['%s'] * len(pks))
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', list(pks))
+        # PostgreSQL rows go with the object (ON DELETE CASCADE)
+
+    def rebuild(self, using=DEFAULT_DB_ALIAS):
+        """Reindex every object; returns the number of rows written"""
+        if not supported(using):
+            return 0
+        if connections[using].vendor == 'sqlite':
+            with connections[using].cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table}')
+        return self.reindex('1 = 1', using=using)
+
+    def search(self, queryset, text, fallback):
+        """``queryset`` narrowed to objects matching every word of ``text`` as a prefix
+
+        Best match first, or newest first when more than RANKED_MATCH_LIMIT
+        objects match. ``fallback(text)`` is the Q filter used on databases
+        without an index.
+        """
+        if not supported(queryset.db):
+            return queryset.filter(fallback(text)).order_by('-created_at')
+        terms = words(text)
+        if not terms:
+            return queryset.none()
+
+        connection = connections[queryset.db]
+        model_table = self.model._meta.db_table
+        if connection.vendor == 'sqlite':
+            join = f'{self.table}.rowid = {model_table}.id'
+            match = f'{self.table} MATCH %s'
+            query = ' '.join(f'"{term}"*' for term in terms)
+            weights = ', '.join(str(weight) for _, _, weight, _ in self.columns)
+            # bm25 is lower for better matches
+            rank, rank_order = f'bm25({self.table}, {weights})', RANK
+        else:
+            join = f'{self.table}.{self.key_column} = {model_table}.id'
+            match = f"{self.table}.document @@ to_tsquery('simple', %s)"
+            query = ' & '.join(f'{term}:*' for term in terms)
+            rank, rank_order = f"ts_rank({self.table}.document, to_tsquery('simple', %s))", f'-{RANK}'
+
+        results = queryset.extra(tables=[self.table], where=[join, match], params=[query])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT 1 FROM {self.table} WHERE {match} LIMIT %s) matches',
+                [query, RANKED_MATCH_LIMIT + 1],
+            )
+            if cursor.fetchone()[0] > RANKED_MATCH_LIMIT:
+                return results.order_by('-created_at')
+        select_params = [query] if '%s' in rank else []
+        return results.extra(select={RANK: rank}, select_params=select_params).order_by(
+            rank_order, '-created_at',
+        )
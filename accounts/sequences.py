@@ -0,0 +1,90 @@
+"""
+Race-free counters for human-readable codes: task codes and invoice numbers.
+
+Each named sequence is one row in the Sequence table. Values are handed out
+by a single ``UPDATE ... SET last_value = last_value + n``, so the database
+row lock serialises concurrent callers, and each call costs the same no matter
+how many rows already exist. A block of n values can be reserved in one
+call for bulk imports. A sequence row is created on first use, starting
+after the highest value already in use.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, F, Max
+from django.db.models.functions import Cast, Substr
+
+from .dates import business_today
+
+TASK_CODE_SEQUENCE = 'task_code'
+TASK_CODE_PREFIX = 'TD'
+FIRST_TASK_NUMBER = 2001
+
+# Invoice numbers restart every month: INV2024120001, INV2024120002, ...
+INVOICE_NUMBER_SEQUENCE = 'invoice_number:{year_month}'
+INVOICE_NUMBER_PREFIX = 'INV'
+
+
+def reserve(name, count=1, start_after=None):
+    """Reserve ``count`` consecutive values of sequence ``name`` and return the first
+
+    ``start_after`` is a callable returning the highest value already in use;
+    it is only called when the sequence does not exist yet.
+    """
+    from .models import Sequence
+
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    rows = Sequence.objects.filter(name=name)
+    with transaction.atomic():
+        # The UPDATE takes the row lock before anything is read, so two
+        # callers can never see the same last_value
+        if not rows.update(last_value=F('last_value') + count):
+            _create(name, start_after)
+            rows.update(last_value=F('last_value') + count)
+        last_value = rows.values_list('last_value', flat=True).get()
+    return last_value - count + 1
+
+
+def _create(name, start_after):
+    from .models import Sequence
+
+    try:
+        with transaction.atomic():
+            Sequence.objects.create(name=name, last_value=start_after() if start_after else 0)
+    except IntegrityError:
+        # Created concurrently by another caller
+        pass
+
+
+def _highest_number(queryset, field, prefix):
+    """Largest integer following ``prefix`` in ``field`` across ``queryset``"""
+    highest = queryset.filter(**{f'{field}__regex': rf'^{prefix}[0-9]+$'}).aggregate(
+        highest=Max(Cast(Substr(field, len(prefix) + 1), BigIntegerField())),
+    )['highest']
+    return highest or 0
+
+
+def _highest_task_number():
+    from .models import Task
+
+    return max(_highest_number(Task.objects.all(), 'task_code', TASK_CODE_PREFIX), FIRST_TASK_NUMBER - 1)
+
+
+def task_codes(count=1):
+    """Reserve ``count`` new task codes (``TD2001``, ``TD2002``, ...)"""
+    first = reserve(TASK_CODE_SEQUENCE, count, start_after=_highest_task_number)
+    return [f'{TASK_CODE_PREFIX}{number}' for number in range(first, first + count)]
+
+
+def invoice_numbers(count=1, day=None):
+    """Reserve ``count`` invoice numbers for the month of ``day`` (default: today)"""
+    from .models import Invoice
+
+    year_month = (day or business_today()).strftime('%Y%m')
+    prefix = f'{INVOICE_NUMBER_PREFIX}{year_month}'
+    first = reserve(
+        INVOICE_NUMBER_SEQUENCE.format(year_month=year_month),
+        count,
+        start_after=lambda: _highest_number(Invoice.objects.all(), 'invoice_number', prefix),
+    )
+    # Four digits as before; the 10000th invoice of a month simply gets five
+    return [f'{prefix}{number:04d}' for number in range(first, first + count)]
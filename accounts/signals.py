@@ -0,0 +1,42 @@
+"""
+Signal wiring for the accounts app, connected from AccountsConfig.ready().
+"""
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from . import archive, dashboard_cache, invoice_search, list_counts, rollups, sqlite, task_search
+from .models import ArchivedInvoice, ArchivedTask, ExpertPayRate, Invoice, Task, TaskAttachment, User
+
+# Keep the DailyMetrics rollup in step with task and invoice writes
+for model in (Task, Invoice):
+    pre_save.connect(rollups.remember_contributions, sender=model, dispatch_uid=f'daily_metrics_pre_save_{model.__name__}')
+    post_save.connect(rollups.update_contributions, sender=model, dispatch_uid=f'daily_metrics_post_save_{model.__name__}')
+    post_delete.connect(rollups.remove_contributions, sender=model, dispatch_uid=f'daily_metrics_post_delete_{model.__name__}')
+
+# Drop cached dashboards whenever data they are computed from changes
+for model in (Task, Invoice, TaskAttachment, ExpertPayRate):
+    post_save.connect(dashboard_cache.invalidate, sender=model, dispatch_uid=f'dashboard_cache_post_save_{model.__name__}')
+    post_delete.connect(dashboard_cache.invalidate, sender=model, dispatch_uid=f'dashboard_cache_post_delete_{model.__name__}')
+
+# Drop cached list totals and facet counts of the lists showing the model
+for model in (Task, Invoice, User):
+    post_save.connect(list_counts.invalidate, sender=model, dispatch_uid=f'list_counts_post_save_{model.__name__}')
+    post_delete.connect(list_counts.invalidate, sender=model, dispatch_uid=f'list_counts_post_delete_{model.__name__}')
+
+# Keep the task search index in step with tasks and client usernames
+post_save.connect(task_search.index_task, sender=Task, dispatch_uid='task_search_post_save')
+post_delete.connect(task_search.unindex_task, sender=Task, dispatch_uid='task_search_post_delete')
+post_save.connect(task_search.reindex_client_tasks, sender=User, dispatch_uid='task_search_user_post_save')
+
+# Invoice search documents also copy task and client fields
+post_save.connect(invoice_search.index_invoice, sender=Invoice, dispatch_uid='invoice_search_post_save')
+post_delete.connect(invoice_search.unindex_invoice, sender=Invoice, dispatch_uid='invoice_search_post_delete')
+post_save.connect(invoice_search.reindex_task_invoice, sender=Task, dispatch_uid='invoice_search_task_post_save')
+post_save.connect(invoice_search.reindex_client_invoices, sender=User, dispatch_uid='invoice_search_user_post_save')
+
+# Archived rows only change when a client is deleted; refresh the cached archive figures
+for model in (ArchivedTask, ArchivedInvoice):
+    post_delete.connect(archive.invalidate, sender=model, dispatch_uid=f'archive_post_delete_{model.__name__}')
+
+# WAL, busy timeout and cache pragmas on every new SQLite connection
+connection_created.connect(sqlite.apply_pragmas, dispatch_uid='sqlite_pragmas')
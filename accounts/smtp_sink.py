@@ -0,0 +1,130 @@
+"""
+Local SMTP server that accepts and keeps mail, for testing the email outbox
+without a real mail server.
+
+    with run_smtp_sink(failure_rate=0.2) as sink:
+        # EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port, EMAIL_USE_TLS=False
+        ...
+    sink.messages  # [(from, [to, ...], raw bytes), ...]
+
+The greeting waits ``handshake_latency`` seconds, like a slow TLS handshake,
+and each message waits ``latency`` more. A message is answered with a
+temporary 451 failure with probability ``failure_rate``, and recipients in
+``reject`` get a permanent 550. Any AUTH PLAIN/LOGIN credentials are
+accepted. There is no TLS, so set EMAIL_USE_TLS=False.
+"""
+import random
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connection_count += 1
+        time.sleep(server.handshake_latency)
+        self.reply('220 texvo-sink ESMTP')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self.wfile.write(b'250-texvo-sink\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 AUTH PLAIN LOGIN\r\n')
+            elif command == 'HELO':
+                self.reply('250 texvo-sink')
+            elif command == 'AUTH':
+                if argument.upper().startswith('LOGIN'):
+                    # Username (sent with the command or prompted for), then password
+                    if len(argument.split()) < 2:
+                        self.reply('334 VXNlcm5hbWU6')
+                        self.rfile.readline()
+                    self.reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                self.reply('235 2.7.0 Accepted')
+            elif command == 'MAIL':
+                sender, recipients = argument.partition(':')[2].split()[0].strip('<>'), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipient = argument.partition(':')[2].split()[0].strip('<>')
+                if recipient in server.reject:
+                    self.reply('550 5.1.1 No such user')
+                else:
+                    recipients.append(recipient)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.receive(sender, recipients)
+                sender, recipients = None, []
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif command == 'NOOP':
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def receive(self, sender, recipients):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b'.\r\n':
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        server = self.server
+        time.sleep(server.latency)
+        if random.random() < server.failure_rate:
+            self.reply('451 4.3.0 Temporary sink failure')
+            return
+        with server.lock:
+            server.messages.append((sender, recipients, b''.join(lines)))
+        if server.on_message:
+            server.on_message(sender, recipients, b''.join(lines))
+        self.reply('250 OK queued')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, handshake_latency=0.0, failure_rate=0.0,
+                 reject=(), on_message=None):
+        super().__init__(address, SinkHandler)
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.failure_rate = failure_rate
+        self.reject = set(reject)
+        self.on_message = on_message
+        self.connection_count = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+@contextmanager
+def run_smtp_sink(**options):
+    """Accept mail on a free local port in a background thread"""
+    sink = SMTPSink(**options)
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield sink
+    finally:
+        sink.shutdown()
+        sink.server_close()
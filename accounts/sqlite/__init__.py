@@ -0,0 +1,25 @@
+"""
+SQLite tuning for running db.sqlite3 behind several worker processes.
+
+``apply_pragmas`` (connected to ``connection_created`` in accounts/signals.py)
+sets ``settings.SQLITE_PRAGMAS`` on every new connection: WAL so readers and
+the writer stop blocking each other, a busy timeout so writers queue for the
+lock instead of failing, and cache/mmap sizes.
+
+The ``accounts.sqlite`` database engine is Django's SQLite backend plus the
+``transaction_mode`` option Django gained in 5.1: with ``IMMEDIATE``,
+``transaction.atomic()`` takes the write lock when the transaction starts.
+A deferred transaction that reads before it writes cannot wait for the lock
+when it upgrades and fails with "database is locked" straight away,
+whatever the busy timeout.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created receiver: apply ``settings.SQLITE_PRAGMAS`` to a new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,86 @@
+"""
+Full-text search over tasks for the task management search box.
+
+Each task has one search row holding its code, module, notes and client
+username (see accounts/search_index.py). ``td20`` finds TD2001, ``ess``
+finds "Essay", and ``2001`` finds TD2001 because a task code is also indexed
+as its bare number.
+
+The signal handlers in accounts/signals.py keep the index in step with
+saves and deletes. Bulk writes skip signals, so run
+``rebuild_task_search`` after them.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .models import Task, User
+from .search_index import SearchIndex, number_terms, supported
+
+SEARCH_TABLE = 'accounts_task_search'
+
+INDEX = SearchIndex(
+    table=SEARCH_TABLE,
+    model=Task,
+    key_column='task_id',
+    key='t.id',
+    source=f'FROM {Task._meta.db_table} t JOIN {User._meta.db_table} u ON u.id = t.client_id',
+    columns=[
+        ('task_code', number_terms('t.task_code'), 10.0, 'A'),
+        ('module_code', 't.module_code', 5.0, 'B'),
+        ('module_name', 't.module_name', 5.0, 'B'),
+        ('notes', 't.notes', 1.0, 'C'),
+        ('client', 'u.username', 3.0, 'B'),
+    ],
+)
+
+
+def create_index(schema_editor):
+    INDEX.create(schema_editor)
+
+
+def drop_index(schema_editor):
+    INDEX.drop(schema_editor)
+
+
+def index_task(sender, instance, **kwargs):
+    """post_save receiver for Task"""
+    using = kwargs.get('using', DEFAULT_DB_ALIAS)
+    if supported(using):
+        INDEX.reindex('t.id = %s', [instance.pk], using)
+
+
+def unindex_task(sender, instance, **kwargs):
+    """post_delete receiver for Task"""
+    INDEX.remove(instance.pk, kwargs.get('using', DEFAULT_DB_ALIAS))
+
+
+def reindex_client_tasks(sender, instance, created=False, update_fields=None, **kwargs):
+    """post_save receiver for User: a renamed client's tasks are found by the new username"""
+    using = kwargs.get('using', DEFAULT_DB_ALIAS)
+    if created or not supported(using):
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        # e.g. the last_login update on every login
+        return
+    INDEX.reindex('t.client_id = %s', [instance.pk], using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Reindex every task; returns the number of rows written"""
+    return INDEX.rebuild(using)
+
+
+def legacy_filter(text):
+    """The substring match task_management used before the search index"""
+    return (
+        Q(task_code__icontains=text) |
+        Q(module_code__icontains=text) |
+        Q(module_name__icontains=text) |
+        Q(notes__icontains=text) |
+        Q(client__username__icontains=text)
+    )
+
+
+def search(queryset, text):
+    """``queryset`` narrowed to tasks matching every word of ``text`` as a prefix, best match first"""
+    return INDEX.search(queryset, text, legacy_filter)
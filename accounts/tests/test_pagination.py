@@ -0,0 +1,30 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import Task, User
+from accounts.pagination import approximate_count
+
+
+class ApproximateCountTests(TestCase):
+    def test_empty_queryset(self):
+        self.assertEqual(approximate_count(Task.objects.none()), (0, True))
+        self.assertEqual(approximate_count(Task.objects.filter(pk__in=[])), (0, True))
+
+
+class PunctuationSearchTests(TestCase):
+    """A search with no words matches nothing instead of failing"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('search_admin', password='x', role='admin'))
+
+    def test_task_management(self):
+        for term in ('---', '"', '*'):
+            with self.subTest(term=term):
+                response = self.client.get(reverse('accounts:task_management'), {'search': term})
+                self.assertEqual(response.status_code, 200)
+
+    def test_invoice_management(self):
+        for term in ('---', '"', '*'):
+            with self.subTest(term=term):
+                response = self.client.get(reverse('accounts:invoice_management'), {'search': term})
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,112 @@
+"""
+Payment and word time series over arbitrary windows.
+
+Each series is one query grouped by a Trunc of the timestamp in the business
+time zone; empty buckets are filled in Python, so the result has one entry
+per day, week (starting Monday) or month in the window. The first and last
+buckets only count the part that falls inside the window. Windows reaching
+back before the archive horizon add the archived rows' buckets.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+
+from . import archive, dates, fx
+from .models import ArchivedInvoice, ArchivedTask, Invoice, Task
+
+GRANULARITIES = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def bucket_start(day, granularity):
+    """First date of the bucket ``day`` falls in"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(start, end, granularity):
+    """Start dates of every bucket overlapping [start, end]"""
+    starts = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        starts.append(current)
+        if granularity == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if granularity == 'week' else 1)
+    return starts
+
+
+def _grouped(hot, archived, field, start, end, granularity, **aggregates):
+    """Rows of ``aggregates`` keyed by bucket start date, in one grouped query per table
+
+    ``archived`` is only read when the window reaches the archive.
+    """
+    since, until = dates.date_range_bounds(start, end)
+    trunc = GRANULARITIES[granularity](field, tzinfo=dates.business_timezone())
+    querysets = [hot, archived] if archive.reaches(since) else [hot]
+    grouped = {}
+    for queryset in querysets:
+        rows = queryset.filter(**{f'{field}__gte': since, f'{field}__lt': until}).annotate(
+            bucket=trunc,
+        ).values('bucket').annotate(**aggregates).order_by()
+        for row in rows:
+            bucket = row.pop('bucket')
+            # TruncWeek/TruncMonth return datetimes in the business time zone
+            totals = grouped.setdefault(bucket.date() if isinstance(bucket, datetime) else bucket, {})
+            for name, value in row.items():
+                totals[name] = (totals.get(name) or 0) + (value or 0)
+    return grouped
+
+
+def payment_series(start, end, granularity='day', rates=None):
+    """Completed payments per bucket, converted to INR at the rate of each payment date"""
+    rates = rates or fx.get_rates()
+    hot, archived = (
+        fx.with_paid_inr_at_payment_date(model.objects.filter(payment_status='Completed'), rates)
+        for model in (Invoice, ArchivedInvoice)
+    )
+    grouped = _grouped(
+        hot, archived, 'payment_date', start, end, granularity,
+        payments=Count('id'), amount_inr=Sum('amount_paid_inr'),
+    )
+    return [
+        {
+            'start': bucket,
+            'payments': grouped.get(bucket, {}).get('payments', 0),
+            'amount_inr': float(grouped.get(bucket, {}).get('amount_inr') or 0),
+        }
+        for bucket in bucket_starts(start, end, granularity)
+    ]
+
+
+def word_series(start, end, granularity='day'):
+    """Words and tasks created per bucket"""
+    grouped = _grouped(
+        Task.objects.all(), ArchivedTask.objects.all(), 'created_at', start, end, granularity,
+        tasks=Count('id'), words=Sum('word_count'),
+    )
+    return [
+        {
+            'start': bucket,
+            'tasks': grouped.get(bucket, {}).get('tasks', 0),
+            'words': grouped.get(bucket, {}).get('words') or 0,
+        }
+        for bucket in bucket_starts(start, end, granularity)
+    ]
+
+
+def combined_series(start, end, granularity='day', rates=None):
+    """Payment and word buckets merged by start date"""
+    words = {row['start']: row for row in word_series(start, end, granularity)}
+    series = payment_series(start, end, granularity, rates)
+    for row in series:
+        row.update(words[row['start']])
+    return series
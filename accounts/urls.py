@@ -14,6 +14,8 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', LogoutView.as_view(next_page='accounts:login'), name='logout'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/dashboard/widgets/<str:widget>/', views.admin_dashboard_widget, name='admin_dashboard_widget'),
+    path('admin/dashboard/timeseries/', views.dashboard_timeseries, name='dashboard_timeseries'),
     path('manager/dashboard/', views.manager_dashboard, name='manager_dashboard'),
     path('client/dashboard/', views.client_dashboard, name='client_dashboard'),
     path('expert/dashboard/', views.expert_dashboard, name='expert_dashboard'),
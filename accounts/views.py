@@ -3,19 +3,22 @@ from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q
-from .models import User, Task, TaskAttachment, Invoice, ExpertPayRate
+from .models import User, Task, TaskAttachment, Invoice, ExpertPayRate, ArchivedTask, ArchivedInvoice
+from . import archive, dashboard_cache, dashboard_widgets, dates, fx, invoice_search, list_counts, outbox, sequences, task_search, timeseries
+from .pagination import paginate_request
+from .routers import reports_view
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime
+import itertools
 import json
 import string
 import secrets
@@ -25,6 +28,10 @@ import random
 from django.db.models import Sum, Count, Case, When, IntegerField, F, DecimalField
 from django.db.models.functions import TruncMonth, ExtractMonth, ExtractYear
 import calendar
+from datetime import timedelta
+
+# Longest window the time-series endpoint serves, in days
+MAX_TIMESERIES_DAYS = 5 * 366
 
 @csrf_protect
 def login_view(request):
@@ -61,295 +68,76 @@ def dashboard_view(request):
 
 # Dashboard views for different roles
 @login_required
+@reports_view
 def admin_dashboard(request):
     if request.user.role != 'admin':
         return redirect('accounts:dashboard')
     
-    from django.db.models import Sum, Count, Q
-    from datetime import datetime, timedelta
-    import json
-    import requests
-    from decimal import Decimal
-    
-    def get_exchange_rate(from_currency, to_currency='INR'):
-        """Get live exchange rate from external API"""
-        try:
-            if from_currency == to_currency:
-                return 1.0
-            
-            # Using exchangerate-api.com (free tier)
-            url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data['rates'].get(to_currency, 1.0)
-            else:
-                # Fallback rates if API fails
-                fallback_rates = {
-                    'USD': 83.0,  # USD to INR
-                    'EUR': 90.0,  # EUR to INR  
-                    'GBP': 105.0, # GBP to INR
-                    'INR': 1.0
-                }
-                return fallback_rates.get(from_currency, 1.0)
-        except Exception as e:
-            print(f"Error fetching exchange rate for {from_currency}: {str(e)}")
-            # Fallback rates
-            fallback_rates = {
-                'USD': 83.0,
-                'EUR': 90.0,
-                'GBP': 105.0,
-                'INR': 1.0
-            }
-            return fallback_rates.get(from_currency, 1.0)
-    
-    # Get current date and time ranges
-    today = timezone.now().date()
-    tomorrow = today + timedelta(days=1)
-    this_month_start = today.replace(day=1)
-    next_month = (this_month_start + timedelta(days=32)).replace(day=1)
-    this_week_start = today - timedelta(days=today.weekday())
-    
-    # Calculate dashboard metrics
-    dashboard_data = {}
-    
-    # Total words in ongoing tasks
-    ongoing_tasks = Task.objects.filter(status='InProgress')
-    dashboard_data['total_words_ongoing'] = ongoing_tasks.aggregate(
-        total=Sum('word_count')
-    )['total'] or 0
-    dashboard_data['ongoing_tasks_count'] = ongoing_tasks.count()
-    
-    # Total words for tasks due tomorrow
-    tomorrow_tasks = Task.objects.filter(deadline__date=tomorrow)
-    dashboard_data['total_words_task_due'] = tomorrow_tasks.aggregate(
-        total=Sum('word_count')
-    )['total'] or 0
-    dashboard_data['tomorrow_tasks_count'] = tomorrow_tasks.count()
-    
-    # Total payments received today (converted to INR)
-    today_payments = Invoice.objects.filter(
-        payment_date__date=today,
-        payment_status='Completed'
-    )
-    total_payments_today_inr = 0
-    for payment in today_payments:
-        exchange_rate = get_exchange_rate(payment.currency, 'INR')
-        amount_inr = float(payment.amount_paid) * exchange_rate
-        total_payments_today_inr += amount_inr
-    
-    dashboard_data['total_payments_today'] = total_payments_today_inr
-    dashboard_data['today_payments_count'] = today_payments.count()
-    
-    # Total payment received and pending with currency conversion
-    all_invoices = Invoice.objects.all()
-    
-    # Calculate total payments received in INR
-    total_payment_received_inr = 0
-    completed_payments_inr = 0
-    partial_payments_inr = 0
-    
-    for invoice in all_invoices:
-        if invoice.amount_paid > 0:
-            # Get exchange rate for invoice currency to INR
-            exchange_rate = get_exchange_rate(invoice.currency, 'INR')
-            amount_paid_inr = float(invoice.amount_paid) * exchange_rate
-            total_payment_received_inr += amount_paid_inr
-              # Categorize as complete or partial payment
-            if invoice.amount_paid >= invoice.amount_due:
-                completed_payments_inr += amount_paid_inr
-            else:
-                partial_payments_inr += amount_paid_inr
-    
-    dashboard_data['total_payment_received'] = total_payment_received_inr
-    dashboard_data['completed_payments_inr'] = completed_payments_inr
-    dashboard_data['partial_payments_inr'] = partial_payments_inr
-    
-    # Currency-wise payment breakdown
-    currency_breakdown = {}
-    for currency_code, currency_name in Invoice.CURRENCY_CHOICES:
-        invoices_by_currency = all_invoices.filter(currency=currency_code)
-        
-        total_paid_in_currency = 0
-        total_due_in_currency = 0
-        completed_count = 0
-        pending_count = 0
-        
-        for invoice in invoices_by_currency:
-            total_paid_in_currency += float(invoice.amount_paid)
-            total_due_in_currency += float(invoice.amount_due)
-            
-            if invoice.payment_status == 'Completed':
-                completed_count += 1
-            else:
-                pending_count += 1
-        
-        if total_paid_in_currency > 0 or total_due_in_currency > 0:
-            # Convert to INR for comparison
-            exchange_rate = get_exchange_rate(currency_code, 'INR')
-            
-            currency_breakdown[currency_code] = {
-                'currency_name': currency_name,
-                'symbol': {'USD': '$', 'EUR': '€', 'GBP': '£', 'INR': '₹'}.get(currency_code, '₹'),
-                'total_paid': total_paid_in_currency,
-                'total_due': total_due_in_currency,
-                'total_paid_inr': total_paid_in_currency * exchange_rate,
-                'total_due_inr': total_due_in_currency * exchange_rate,
-                'pending_amount': total_due_in_currency - total_paid_in_currency,
-                'pending_amount_inr': (total_due_in_currency - total_paid_in_currency) * exchange_rate,
-                'completed_count': completed_count,
-                'pending_count': pending_count,
-                'payment_percentage': (total_paid_in_currency / total_due_in_currency * 100) if total_due_in_currency > 0 else 0
-            }
-    
-    dashboard_data['currency_breakdown'] = currency_breakdown
-
-    # Calculate total pending amount (simple loop method)
-    pending_invoices = all_invoices.exclude(payment_status='Completed')
-    total_pending = 0
-    for invoice in pending_invoices:
-        balance = invoice.amount_due - invoice.amount_paid
-        if balance > 0:
-            # Convert balance to INR
-            exchange_rate = get_exchange_rate(invoice.currency, 'INR')
-            balance_inr = float(balance) * exchange_rate
-            total_pending += balance_inr
-    
-    dashboard_data['total_payment_pending'] = total_pending
-    dashboard_data['received_invoices_count'] = all_invoices.filter(payment_status='Completed').count()
-    dashboard_data['pending_invoices_count'] = pending_invoices.count()
-    
-    # Total words this month
-    this_month_tasks = Task.objects.filter(created_at__date__range=[this_month_start, today])
-    dashboard_data['total_words_this_month'] = this_month_tasks.aggregate(
-        total=Sum('word_count')
-    )['total'] or 0
-    dashboard_data['this_month_tasks_count'] = this_month_tasks.count()
-      # Payment chart data (last 7 days)
-    payment_chart_data = []
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        daily_payments = Invoice.objects.filter(
-            payment_date__date=date,
-            payment_status='Completed'
-        )
-        
-        daily_total_inr = 0
-        for payment in daily_payments:
-            exchange_rate = get_exchange_rate(payment.currency, 'INR')
-            amount_inr = float(payment.amount_paid) * exchange_rate
-            daily_total_inr += amount_inr
-        
-        payment_chart_data.append({
-            'date': date.strftime('%m/%d'),
-            'amount': daily_total_inr
-        })
-      # Word count chart data (last 7 days)
-    word_chart_data = []
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        daily_words = Task.objects.filter(
-            created_at__date=date
-        ).aggregate(total=Sum('word_count'))['total'] or 0
-        word_chart_data.append({
-            'date': date.strftime('%m/%d'),
-            'words': daily_words
-        })
-    
-    # Expert upcoming payments (next 7 days)
-    upcoming_deadline = today + timedelta(days=7)
-    expert_payments = []    
-    experts = User.objects.filter(role='expert', is_active=True)
-    for expert in experts:
-        upcoming_tasks = Task.objects.filter(
-            allocation=expert,
-            deadline__date__range=[today, upcoming_deadline],
-            status__in=['InProgress', 'Pending']
-        )
-        
-        total_amount = 0
-        task_count = 0
-        
-        for task in upcoming_tasks:
-            if hasattr(task, 'invoice'):
-                balance = task.invoice.amount_due - task.invoice.amount_paid
-                if balance > 0:
-                    # Convert balance to INR
-                    exchange_rate = get_exchange_rate(task.invoice.currency, 'INR')
-                    balance_inr = float(balance) * exchange_rate
-                    total_amount += balance_inr
-                    task_count += 1
-        
-        if total_amount > 0:
-            expert_payments.append({
-                'expert_name': f"{expert.first_name} {expert.last_name}".strip() or expert.username,
-                'amount': total_amount,
-                'task_count': task_count
-            })
-    
-    # Sort by amount descending
-    expert_payments = sorted(expert_payments, key=lambda x: x['amount'], reverse=True)[:5]
-    
-    # Upcoming tasks for mini calendar (next 7 days)
-    upcoming_tasks = Task.objects.filter(
-        deadline__date__range=[today, upcoming_deadline]
-    ).select_related('client', 'allocation').order_by('deadline')[:10]
-    
-    calendar_tasks = []
-    for task in upcoming_tasks:
-        calendar_tasks.append({
-            'task_code': task.task_code,
-            'client_name': f"{task.client.first_name} {task.client.last_name}".strip() or task.client.username,
-            'deadline': task.deadline.strftime('%Y-%m-%d'),
-            'deadline_formatted': task.deadline.strftime('%b %d'),
-            'status': task.status,
-            'allocation': task.allocation.username if task.allocation else 'Unassigned'
-        })
-    
-    # Recent activity (last 10 actions)
-    recent_tasks = Task.objects.filter(
-        created_at__date__gte=this_week_start
-    ).select_related('client', 'created_by').order_by('-created_at')[:5]
-    
-    recent_payments = Invoice.objects.filter(
-        payment_date__date__gte=this_week_start
-    ).select_related('task', 'task__client').order_by('-payment_date')[:5]
-    
-    # System statistics
-    system_stats = {
-        'total_users': User.objects.count(),
-        'total_clients': User.objects.filter(role='client').count(),
-        'total_experts': User.objects.filter(role='expert').count(),
-        'total_tasks': Task.objects.count(),
-        'completed_tasks': Task.objects.filter(status='Completed').count(),
-        'total_invoices': Invoice.objects.count(),
-        'paid_invoices': Invoice.objects.filter(payment_status='Completed').count(),
-    }
-    
-    # Task status distribution
-    status_distribution = {
-        'pending': Task.objects.filter(status='Pending').count(),
-        'in_progress': Task.objects.filter(status='InProgress').count(),
-        'completed': Task.objects.filter(status='Completed').count(),
-    }
-    
+    # The page is a shell; each section loads from admin_dashboard_widget
+    chart_days = request.GET.get('chart_days', '7')
     context = {
         'user': request.user,
-        'dashboard_data': dashboard_data,
-        'payment_chart_data': json.dumps(payment_chart_data),
-        'word_chart_data': json.dumps(word_chart_data),
-        'expert_payments': expert_payments,
-        'calendar_tasks': calendar_tasks,
-        'recent_tasks': recent_tasks,
-        'recent_payments': recent_payments,
-        'system_stats': system_stats,
-        'status_distribution': json.dumps(status_distribution),
-        'today': today.strftime('%Y-%m-%d'),
+        'chart_days': int(chart_days) if chart_days in dashboard_widgets.CHART_PERIODS else 7,
+        'dashboard_cache_stats': dashboard_cache.stats(),
     }
-    
     return render(request, 'accounts/admin_dashboard.html', context)
 
+@login_required
+@reports_view
+def admin_dashboard_widget(request, widget):
+    """JSON payload (HTML fragment and data) for one admin dashboard widget"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'message': 'Unauthorized'})
+    if widget not in dashboard_widgets.WIDGETS:
+        return JsonResponse({'success': False, 'message': f'Unknown widget: {widget}'})
+    
+    chart_days = request.GET.get('chart_days', '7')
+    chart_days = int(chart_days) if chart_days in dashboard_widgets.CHART_PERIODS else 7
+    try:
+        payload = dashboard_widgets.render_widget(widget, request.user.role, chart_days)
+    except Exception as e:
+        print(f"Error computing dashboard widget {widget}: {e}")
+        return JsonResponse({'success': False, 'message': 'Could not load this widget'})
+    return JsonResponse({'success': True, **payload})
+
+@login_required
+@reports_view
+def dashboard_timeseries(request):
+    """Daily, weekly or monthly payment (INR) and word buckets for any date window"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'message': 'Unauthorized'})
+    
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in timeseries.GRANULARITIES:
+        return JsonResponse({'success': False, 'message': 'granularity must be day, week or month'})
+    
+    today = dates.business_today()
+    try:
+        end = parse_date(request.GET['end']) if request.GET.get('end') else today
+        if request.GET.get('start'):
+            start = parse_date(request.GET['start'])
+        else:
+            # Clamped before timedelta can overflow; one past the limit still
+            # fails the window check below
+            days = min(max(int(request.GET.get('days', 30)), 0), MAX_TIMESERIES_DAYS + 1)
+            start = end - timedelta(days=days - 1)
+    except (ValueError, OverflowError):
+        start = end = None
+    if not start or not end or start > end:
+        return JsonResponse({'success': False, 'message': 'Invalid date window'})
+    if (end - start).days >= MAX_TIMESERIES_DAYS:
+        return JsonResponse({'success': False, 'message': f'Window is limited to {MAX_TIMESERIES_DAYS} days'})
+    
+    series = timeseries.combined_series(start, end, granularity)
+    return JsonResponse({
+        'success': True,
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'timezone': str(dates.business_timezone()),
+        'buckets': [dict(row, start=row['start'].isoformat()) for row in series],
+    })
+
 @login_required
 def manager_dashboard(request):
     if request.user.role != 'manager':
@@ -389,6 +177,8 @@ def user_management(request):
             Q(first_name__icontains=search_query) |
             Q(last_name__icontains=search_query)
         )
+    searched = users
+    filters = {'search': search_query, 'role': role_filter, 'status': status_filter}
     
     # Apply role filter
     if role_filter:
@@ -400,16 +190,35 @@ def user_management(request):
     elif status_filter == 'inactive':
         users = users.filter(is_active=False)
     
-    # Order by date joined (newest first)
-    users = users.order_by('-date_joined')
+    # Newest first, 10 users per page
+    page_obj = paginate_request(
+        request, users, ordering=('-date_joined', 'id'), count=list_counts.counter('users', filters),
+    )
     
-    # Pagination
-    paginator = Paginator(users, 10)  # Show 10 users per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        data = {
+            'users': [
+                {
+                    'id': user_obj.id,
+                    'username': user_obj.username,
+                    'email': user_obj.email,
+                    'first_name': user_obj.first_name,
+                    'last_name': user_obj.last_name,
+                    'role': user_obj.get_role_display(),
+                    'is_active': user_obj.is_active,
+                    'date_joined': user_obj.date_joined.strftime('%B %d, %Y at %I:%M %p'),
+                }
+                for user_obj in page_obj
+            ],
+            **page_obj.as_dict(),
+        }
+        if request.GET.get('facets') == '1':
+            data['facets'] = list_counts.facet_counts('users', searched, filters)
+        return JsonResponse(data)
     
     # Get role choices for filter dropdown
     role_choices = User.ROLE_CHOICES
+    facets = list_counts.facet_counts('users', searched, filters)
     
     context = {
         'users': page_obj,
@@ -417,7 +226,9 @@ def user_management(request):
         'role_filter': role_filter,
         'status_filter': status_filter,
         'role_choices': role_choices,
-        'total_users': users.count(),
+        'role_facets': [(value, label, facets['role'].get(value, 0)) for value, label in role_choices],
+        'status_counts': facets['status'],
+        'total_users': page_obj.total,
     }
     
     return render(request, 'accounts/user_management.html', context)
@@ -774,18 +585,18 @@ Best regards,
 The Texvo Team
         '''
         
-        send_mail(
+        outbox.enqueue(
+            'password_reset',
             subject,
             plain_message,
-            settings.EMAIL_HOST_USER,
-            [user_obj.email],
-            fail_silently=False,
-            html_message=html_message,
+            user_obj.email,
+            html_body=html_message,
+            from_email=settings.EMAIL_HOST_USER,
         )
         
         return JsonResponse({
             'success': True, 
-            'message': f'Password reset link sent to {user_obj.email} successfully'
+            'message': f'Password reset link queued for {user_obj.email}'
         })
         
     except Exception as e:
@@ -804,15 +615,11 @@ def task_management(request):
     # Start with all tasks
     tasks = Task.objects.all().select_related('allocation', 'created_by', 'client')
     
-    # Apply search filter
+    # Search results best match first, otherwise newest first
     if search_query:
-        tasks = tasks.filter(
-            Q(task_code__icontains=search_query) |
-            Q(module_code__icontains=search_query) |
-            Q(module_name__icontains=search_query) |
-            Q(notes__icontains=search_query) |
-            Q(client__username__icontains=search_query)
-        )
+        tasks = task_search.search(tasks, search_query)
+    searched = tasks
+    filters = {'search': search_query, 'status': status_filter, 'allocation': allocation_filter}
     
     # Apply status filter
     if status_filter:
@@ -825,17 +632,38 @@ def task_management(request):
         else:
             tasks = tasks.filter(allocation_id=allocation_filter)
     
-    # Order by created date (newest first)
-    tasks = tasks.order_by('-created_at')
-      # Pagination
-    paginator = Paginator(tasks, 10)  # Show 10 tasks per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_request(request, tasks, count=list_counts.counter('tasks', filters))  # 10 tasks per page
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        data = {
+            'tasks': [
+                {
+                    'id': task.id,
+                    'task_code': task.task_code,
+                    'client': task.client.username,
+                    'module_code': task.module_code,
+                    'module_name': task.module_name,
+                    'deadline': task.deadline.strftime('%Y-%m-%d %H:%M'),
+                    'formatted_price': task.formatted_price,
+                    'allocation': task.allocation.username if task.allocation else 'Unassigned',
+                    'status': task.get_status_display(),
+                    'created_at': task.created_at.strftime('%B %d, %Y at %I:%M %p'),
+                }
+                for task in page_obj
+            ],
+            **page_obj.as_dict(),
+        }
+        if request.GET.get('facets') == '1':
+            data['facets'] = list_counts.facet_counts('tasks', searched, filters)
+        return JsonResponse(data)
     
     # Get experts and clients for dropdowns
     experts = User.objects.filter(role='expert', is_active=True)
     clients = User.objects.filter(role='client', is_active=True)
     
+    # Task counts for the filter dropdowns
+    facets = list_counts.facet_counts('tasks', searched, filters)
+    
     context = {
         'tasks': page_obj,
         'search_query': search_query,
@@ -845,11 +673,42 @@ def task_management(request):
         'currency_choices': Task.CURRENCY_CHOICES,
         'experts': experts,
         'clients': clients,
-        'total_tasks': tasks.count(),
+        'status_facets': [
+            (value, label, facets['status'].get(value, 0)) for value, label in Task.STATUS_CHOICES
+        ],
+        'expert_facets': [(expert, facets['allocation'].get(str(expert.id), 0)) for expert in experts],
+        'unassigned_count': facets['allocation'].get('unassigned', 0),
+        'total_tasks': page_obj.total,
     }
     
     return render(request, 'accounts/task_management.html', context)
 
+def store_attachments(task, files):
+    """Write uploaded files to storage ahead of the transaction that inserts their rows
+
+    Copying up to 100MB takes far longer than the inserts, too long to hold
+    the database write lock for. Returns unsaved TaskAttachments.
+    """
+    attachments = []
+    try:
+        for file in files:
+            attachment = TaskAttachment(task=task, file_name=file.name, file_size=file.size)
+            attachment.file.save(file.name, file, save=False)
+            attachments.append(attachment)
+    except Exception:
+        delete_files([attachment.file for attachment in attachments])
+        raise
+    return attachments
+
+def delete_files(files):
+    """Remove stored files; a file that can't be removed is only logged"""
+    for file in files:
+        if file:
+            try:
+                file.delete(save=False)
+            except Exception as e:
+                print(f"Error deleting file {file.name}: {str(e)}")
+
 @login_required
 def task_create(request):
     if request.user.role not in ['admin', 'manager']:
@@ -923,7 +782,11 @@ def task_create(request):
                 messages.error(request, 'Total file size exceeds 100MB limit')
                 return redirect('accounts:task_management')
             
-            task = Task.objects.create(
+            # Validation is done. The code is reserved first because it names
+            # the attachments' folder, so the files are stored before the
+            # write lock is taken and the transaction only holds the inserts.
+            task = Task(
+                task_code=sequences.task_codes()[0],
                 client=client,
                 module_code=module_code,
                 module_name=module_name,
@@ -937,19 +800,22 @@ def task_create(request):
                 notes=notes,
                 created_by=request.user
             )
-            
-            # Save multiple attachments
-            for file in files:
-                TaskAttachment.objects.create(
-                    task=task,
-                    file=file,
-                    file_name=file.name,
-                    file_size=file.size
-                )
-            
-            # Send email to expert if allocated during creation
-            if allocation:
-                send_expert_allocation_email(request, task, allocation)
+            attachments = store_attachments(task, files)
+            try:
+                with transaction.atomic():
+                    task.save()
+                    
+                    # Save multiple attachments
+                    for attachment in attachments:
+                        attachment.task = task
+                        attachment.save()
+                    
+                    # Email the expert if allocated during creation, queued in the task's transaction
+                    if allocation:
+                        send_expert_allocation_email(request, task, allocation)
+            except Exception:
+                delete_files([attachment.file for attachment in attachments])
+                raise
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'message': f'Task {task.task_code} created successfully'})
@@ -1079,20 +945,22 @@ def task_edit(request, task_id):
                         return JsonResponse({'success': False, 'message': f'File {file.name} exceeds 25MB limit'})
                     messages.error(request, f'File {file.name} exceeds 25MB limit')
                     return redirect('accounts:task_management')
-                
-                # Create new attachment
-                TaskAttachment.objects.create(
-                    task=task,
-                    file=file,
-                    file_name=file.name,
-                    file_size=file.size
-                )
             
-            task.save()
-            
-            # Send email to expert if newly allocated
-            if task.allocation and old_allocation != task.allocation:
-                send_expert_allocation_email(request, task, task.allocation)
+            # All files checked, then stored before the write lock is taken
+            attachments = store_attachments(task, files)
+            try:
+                with transaction.atomic():
+                    for attachment in attachments:
+                        attachment.save()
+                    
+                    task.save()
+                    
+                    # Email the expert if newly allocated, queued in the same transaction as the allocation
+                    if task.allocation and old_allocation != task.allocation:
+                        send_expert_allocation_email(request, task, task.allocation)
+            except Exception:
+                delete_files([attachment.file for attachment in attachments])
+                raise
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 success_message = 'Expert allocated successfully!' if is_quick_allocation else 'Task updated successfully'
@@ -1152,17 +1020,17 @@ def task_delete(request, task_id):
     
     try:
         task_code = task.task_code
-        # Delete associated attachments
-        for attachment in task.task_attachments.all():
-            if attachment.file:
-                attachment.file.delete(save=False)
-            attachment.delete()
-        
-        # Delete old attachment field if exists
-        if task.attachments:
-            task.attachments.delete()
-        
-        task.delete()
+        with transaction.atomic():
+            # Delete associated attachments, and the old attachment field's file
+            files = [task.attachments]
+            for attachment in task.task_attachments.all():
+                files.append(attachment.file)
+                attachment.delete()
+            
+            task.delete()
+            
+            # Files go only once the rows are gone for good, so a rollback keeps both
+            transaction.on_commit(lambda: delete_files(files))
         return JsonResponse({'success': True, 'message': f'Task {task_code} deleted successfully'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
@@ -1189,7 +1057,11 @@ def delete_attachment(request, attachment_id):
         return JsonResponse({'success': False, 'message': f'Error deleting attachment: {str(e)}'})
 
 def send_expert_allocation_email(request, task, expert):
-    """Send email notification to expert when task is allocated"""
+    """Queue an email notification to the expert when a task is allocated
+
+    Call inside the transaction that saves the allocation, so the email is
+    queued exactly when the allocation commits. Errors propagate.
+    """
     if not expert.email:
         return False
     
@@ -1402,18 +1274,21 @@ Best regards,
 The Texvo Team
         '''
         
-        send_mail(
+        outbox.enqueue(
+            'expert_allocation',
             subject,
             plain_message,
-            settings.EMAIL_HOST_USER,
-            [expert.email],
-            fail_silently=False,            html_message=html_message,        )
+            expert.email,
+            html_body=html_message,
+            from_email=settings.EMAIL_HOST_USER,
+        )
         
         return True
         
     except Exception as e:
-        print(f"Error sending expert allocation email: {str(e)}")
-        return False
+        print(f"Error queueing expert allocation email: {str(e)}")
+        # Fail the caller's transaction rather than save the change without its email
+        raise
 
 @login_required
 def invoice_management(request):
@@ -1428,16 +1303,11 @@ def invoice_management(request):
     # Start with all invoices
     invoices = Invoice.objects.all().select_related('task', 'task__client')
     
-    # Apply search filter
+    # Search results best match first, otherwise newest first
     if search_query:
-        invoices = invoices.filter(
-            Q(invoice_number__icontains=search_query) |
-            Q(task__task_code__icontains=search_query) |
-            Q(task__module_name__icontains=search_query) |
-            Q(task__client__username__icontains=search_query) |
-            Q(task__client__first_name__icontains=search_query) |
-            Q(task__client__last_name__icontains=search_query)
-        )
+        invoices = invoice_search.search(invoices, search_query)
+    searched = invoices
+    filters = {'search': search_query, 'status': status_filter, 'client': client_filter}
     
     # Apply status filter
     if status_filter:
@@ -1447,17 +1317,37 @@ def invoice_management(request):
     if client_filter:
         invoices = invoices.filter(task__client_id=client_filter)
     
-    # Order by created date (newest first)
-    invoices = invoices.order_by('-created_at')
+    # 10 invoices per page
+    page_obj = paginate_request(request, invoices, count=list_counts.counter('invoices', filters))
     
-    # Pagination
-    paginator = Paginator(invoices, 10)  # Show 10 invoices per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        data = {
+            'invoices': [
+                {
+                    'id': invoice.id,
+                    'invoice_number': invoice.invoice_number,
+                    'task_code': invoice.task.task_code,
+                    'client': invoice.task.client.username,
+                    'amount_due': str(invoice.amount_due),
+                    'amount_paid': str(invoice.amount_paid),
+                    'currency': invoice.currency,
+                    'payment_status': invoice.get_payment_status_display(),
+                    'created_at': invoice.created_at.strftime('%B %d, %Y at %I:%M %p'),
+                }
+                for invoice in page_obj
+            ],
+            **page_obj.as_dict(),
+        }
+        if request.GET.get('facets') == '1':
+            data['facets'] = list_counts.facet_counts('invoices', searched, filters)
+        return JsonResponse(data)
     
     # Get clients for dropdown
     clients = User.objects.filter(role='client', is_active=True)
     
+    # Invoice counts for the filter dropdowns
+    facets = list_counts.facet_counts('invoices', searched, filters)
+    
     context = {
         'invoices': page_obj,
         'search_query': search_query,
@@ -1465,7 +1355,11 @@ def invoice_management(request):
         'client_filter': client_filter,
         'status_choices': Invoice.PAYMENT_STATUS_CHOICES,
         'clients': clients,
-        'total_invoices': invoices.count(),
+        'status_facets': [
+            (value, label, facets['status'].get(value, 0)) for value, label in Invoice.PAYMENT_STATUS_CHOICES
+        ],
+        'client_facets': [(client, facets['client'].get(str(client.id), 0)) for client in clients],
+        'total_invoices': page_obj.total,
     }
     
     return render(request, 'accounts/invoice_management.html', context)
@@ -1501,41 +1395,26 @@ def create_invoice(request):
                     return JsonResponse({'success': False, 'message': 'Invoice already exists for this task'})
                 messages.error(request, 'Invoice already exists for this task')
                 return redirect('accounts:invoice_management')
-              # Generate invoice number if not provided
-            def generate_invoice_number():
-                from datetime import datetime
-                now = datetime.now()
-                year_month = now.strftime('%Y%m')
-                
-                # Get the last invoice number for this month
-                last_invoice = Invoice.objects.filter(
-                    invoice_number__startswith=f'INV{year_month}'
-                ).order_by('-invoice_number').first()
-                
-                if last_invoice:
-                    try:
-                        last_sequence = int(last_invoice.invoice_number[-4:])
-                        new_sequence = last_sequence + 1
-                    except (ValueError, IndexError):
-                        new_sequence = 1
-                else:
-                    new_sequence = 1
-                
-                return f'INV{year_month}{new_sequence:04d}'
-            
-            invoice = Invoice.objects.create(
-                task=task,
-                amount_due=amount_due,
-                currency=task.currency,
-                invoice_number=generate_invoice_number()
-            )
             
-            # Send invoice email to client
-            send_invoice_email_to_client(request, invoice)
+            # Invoice.save() assigns the next number from this month's sequence
+            with transaction.atomic():
+                invoice = Invoice.objects.create(
+                    task=task,
+                    amount_due=amount_due,
+                    currency=task.currency,
+                )
+                
+                # Queue the invoice email to the client with the invoice itself
+                queued = send_invoice_email_to_client(request, invoice)
             
+            # The worker sends the email later, so only its queueing is reported
+            if queued:
+                success_message = f'Invoice {invoice.invoice_number} created and queued for emailing to the client'
+            else:
+                success_message = f'Invoice {invoice.invoice_number} created; the client has no email address, so nothing was sent'
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': True, 'message': f'Invoice {invoice.invoice_number} created and sent to client successfully'})
-            messages.success(request, f'Invoice {invoice.invoice_number} created and sent to client successfully')
+                return JsonResponse({'success': True, 'message': success_message})
+            messages.success(request, success_message)
             
         except Exception as e:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1649,7 +1528,9 @@ def update_payment(request, invoice_id):
             if amount_paid >= invoice.amount_due and not invoice.payment_date:
                 invoice.payment_date = timezone.now()
             
-            invoice.save()
+            # The save and the rollup/cache signals it fires commit together
+            with transaction.atomic():
+                invoice.save()
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'message': 'Payment updated successfully'})
@@ -1685,7 +1566,8 @@ def delete_invoice(request, invoice_id):
     
     try:
         invoice_number = invoice.invoice_number
-        invoice.delete()
+        with transaction.atomic():
+            invoice.delete()
         return JsonResponse({'success': True, 'message': f'Invoice {invoice_number} deleted successfully'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
@@ -1702,13 +1584,14 @@ def resend_invoice(request, invoice_id):
         # Send invoice email to client
         success = send_invoice_email_to_client(request, invoice)
         if success:
-            return JsonResponse({'success': True, 'message': f'Invoice {invoice.invoice_number} resent to client successfully'})
+            return JsonResponse({'success': True, 'message': f'Invoice {invoice.invoice_number} queued for resending to the client'})
         else:
             return JsonResponse({'success': False, 'message': 'Failed to send invoice email - client may not have an email address'})
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'Error resending invoice: {str(e)}'})
 
 @login_required
+@reports_view
 def calendar_view(request):
     if request.user.role not in ['admin', 'manager']:
         return redirect('accounts:dashboard')
@@ -1717,21 +1600,16 @@ def calendar_view(request):
     year = int(request.GET.get('year', timezone.now().year))
     month = int(request.GET.get('month', timezone.now().month))
     
-    # Create date range for the month
     start_date = timezone.datetime(year, month, 1)
-    if month == 12:
-        end_date = timezone.datetime(year + 1, 1, 1) - timezone.timedelta(days=1)
-    else:
-        end_date = timezone.datetime(year, month + 1, 1) - timezone.timedelta(days=1)
     
     # Get all tasks for the month
     tasks = Task.objects.filter(
-        deadline__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('deadline', year, month)
     ).select_related('client', 'allocation').order_by('deadline')
     
     # Get all invoices with payment dates in the month
     invoices = Invoice.objects.filter(
-        payment_date__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('payment_date', year, month)
     ).select_related('task', 'task__client')
     
     # Organize events by date
@@ -1739,7 +1617,7 @@ def calendar_view(request):
     
     # Add task deadlines
     for task in tasks:
-        date_key = task.deadline.date().isoformat()
+        date_key = dates.business_date(task.deadline).isoformat()
         if date_key not in calendar_events:
             calendar_events[date_key] = {'tasks': [], 'payments': []}
           # Determine task status and payment info
@@ -1767,7 +1645,7 @@ def calendar_view(request):
     
     # Add payment dates
     for invoice in invoices:
-        date_key = invoice.payment_date.date().isoformat()
+        date_key = dates.business_date(invoice.payment_date).isoformat()
         if date_key not in calendar_events:
             calendar_events[date_key] = {'tasks': [], 'payments': []}
             calendar_events[date_key]['payments'].append({
@@ -1786,10 +1664,10 @@ def calendar_view(request):
     in_progress_tasks = tasks.filter(status='InProgress').count()
     
     total_invoices = Invoice.objects.filter(
-        task__deadline__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('task__deadline', year, month)
     ).count()
     paid_invoices = Invoice.objects.filter(
-        task__deadline__date__range=[start_date.date(), end_date.date()],
+        dates.in_month('task__deadline', year, month),
         payment_status='Completed'
     ).count()    
     context = {
@@ -1813,6 +1691,7 @@ def calendar_view(request):
     return render(request, 'accounts/calendar_view.html', context)
 
 @login_required
+@reports_view
 def calendar_view_new(request):
     if request.user.role not in ['admin', 'manager']:
         return redirect('accounts:dashboard')
@@ -1821,21 +1700,16 @@ def calendar_view_new(request):
     year = int(request.GET.get('year', timezone.now().year))
     month = int(request.GET.get('month', timezone.now().month))
     
-    # Create date range for the month
     start_date = timezone.datetime(year, month, 1)
-    if month == 12:
-        end_date = timezone.datetime(year + 1, 1, 1) - timezone.timedelta(days=1)
-    else:
-        end_date = timezone.datetime(year, month + 1, 1) - timezone.timedelta(days=1)
     
     # Get all tasks for the month
     tasks = Task.objects.filter(
-        deadline__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('deadline', year, month)
     ).select_related('client', 'allocation').order_by('deadline')
     
     # Get all invoices with payment dates in the month
     invoices = Invoice.objects.filter(
-        payment_date__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('payment_date', year, month)
     ).select_related('task', 'task__client')
     
     # Organize events by date
@@ -1843,7 +1717,7 @@ def calendar_view_new(request):
     
     # Add task deadlines
     for task in tasks:
-        date_key = task.deadline.date().isoformat()
+        date_key = dates.business_date(task.deadline).isoformat()
         if date_key not in calendar_events:
             calendar_events[date_key] = {'tasks': [], 'payments': []}
         
@@ -1876,7 +1750,7 @@ def calendar_view_new(request):
     
     # Add payment dates
     for invoice in invoices:
-        date_key = invoice.payment_date.date().isoformat()
+        date_key = dates.business_date(invoice.payment_date).isoformat()
         if date_key not in calendar_events:
             calendar_events[date_key] = {'tasks': [], 'payments': []}
         
@@ -1896,10 +1770,10 @@ def calendar_view_new(request):
     in_progress_tasks = tasks.filter(status='InProgress').count()
     
     total_invoices = Invoice.objects.filter(
-        task__deadline__date__range=[start_date.date(), end_date.date()]
+        dates.in_month('task__deadline', year, month)
     ).count()
     paid_invoices = Invoice.objects.filter(
-        task__deadline__date__range=[start_date.date(), end_date.date()],
+        dates.in_month('task__deadline', year, month),
         payment_status='Completed'
     ).count()    
     context = {
@@ -1924,6 +1798,7 @@ def calendar_view_new(request):
 
 # Simple Calendar View with Proper JSON Serialization
 @login_required  
+@reports_view
 def calendar_simple(request):
     if request.user.role not in ['admin', 'manager']:
         return redirect('accounts:dashboard')
@@ -1934,22 +1809,23 @@ def calendar_simple(request):
     year = int(request.GET.get('year', timezone.now().year))
     month = int(request.GET.get('month', timezone.now().month))
     
-    # Get tasks for the month
-    start_date = timezone.datetime(year, month, 1).date()
-    if month == 12:
-        end_date = timezone.datetime(year + 1, 1, 1).date() - timezone.timedelta(days=1)
-    else:
-        end_date = timezone.datetime(year, month + 1, 1).date() - timezone.timedelta(days=1)
+    # Get tasks for the month, from the archive too for older months
+    task_models, invoice_models = [Task], [Invoice]
+    if archive.reaches(dates.month_bounds(year, month)[0]):
+        task_models.append(ArchivedTask)
+        invoice_models.append(ArchivedInvoice)
+    tasks = [model.objects.filter(dates.in_month('deadline', year, month)) for model in task_models]
+    invoices = [model.objects.filter(dates.in_month('payment_date', year, month)) for model in invoice_models]
     
-    tasks = Task.objects.filter(deadline__date__range=[start_date, end_date])
-    invoices = Invoice.objects.filter(payment_date__date__range=[start_date, end_date])
+    def count(querysets, **filters):
+        return sum(queryset.filter(**filters).count() for queryset in querysets)
     
     # Simple event structure
     events = {}
     
     # Add tasks
-    for task in tasks:
-        date_str = task.deadline.date().strftime('%Y-%m-%d')
+    for task in itertools.chain(*tasks):
+        date_str = dates.business_date(task.deadline).strftime('%Y-%m-%d')
         if date_str not in events:
             events[date_str] = {'tasks': [], 'payments': []}
         
@@ -1962,8 +1838,8 @@ def calendar_simple(request):
         })
     
     # Add payments  
-    for invoice in invoices:
-        date_str = invoice.payment_date.date().strftime('%Y-%m-%d')
+    for invoice in itertools.chain(*invoices):
+        date_str = dates.business_date(invoice.payment_date).strftime('%Y-%m-%d')
         if date_str not in events:
             events[date_str] = {'tasks': [], 'payments': []}
             
@@ -1979,12 +1855,12 @@ def calendar_simple(request):
         'current_month': month,
         'current_date': timezone.now().date().strftime('%Y-%m-%d'),
         'month_name': timezone.datetime(year, month, 1).strftime('%B'),
-        'total_tasks': tasks.count(),
-        'completed_tasks': tasks.filter(status='Completed').count(),
-        'pending_tasks': tasks.filter(status='Pending').count(),
-        'in_progress_tasks': tasks.filter(status='InProgress').count(),
-        'total_invoices': invoices.count(),
-        'paid_invoices': invoices.filter(payment_status='Completed').count(),
+        'total_tasks': count(tasks),
+        'completed_tasks': count(tasks, status='Completed'),
+        'pending_tasks': count(tasks, status='Pending'),
+        'in_progress_tasks': count(tasks, status='InProgress'),
+        'total_invoices': count(invoices),
+        'paid_invoices': count(invoices, payment_status='Completed'),
         'prev_month': (month - 1) if month > 1 else 12,
         'prev_year': year if month > 1 else year - 1,
         'next_month': (month + 1) if month < 12 else 1,
@@ -1994,7 +1870,11 @@ def calendar_simple(request):
     return render(request, 'accounts/calendar_view.html', context)
 
 def send_invoice_email_to_client(request, invoice):
-    """Send invoice email to client with payment button based on currency"""
+    """Queue the invoice email to the client, with a payment button for the currency
+
+    Errors propagate, so a view creating the invoice in the same transaction
+    does not keep an invoice whose email was never queued.
+    """
     client = invoice.task.client
     
     if not client.email:
@@ -2349,19 +2229,19 @@ Best regards,
 The TEXVO Team
         '''
         
-        send_mail(
+        outbox.enqueue(
+            'invoice',
             subject,
             plain_message,
-            settings.EMAIL_HOST_USER,
-            [client.email],
-            fail_silently=False,
-            html_message=html_message,
+            client.email,
+            html_body=html_message,
+            from_email=settings.EMAIL_HOST_USER,
         )
         return True
         
     except Exception as e:
-        print(f"Error sending invoice email: {str(e)}")
-        return False
+        print(f"Error queueing invoice email: {str(e)}")
+        raise
 
 @login_required
 def get_available_tasks(request):
@@ -2417,13 +2297,14 @@ def settings_view(request):
         otp = str(random.randint(100000, 999999))
         request.session['settings_otp'] = otp
         request.session['settings_otp_user'] = user.pk
-        # Send OTP to email
-        send_mail(
+        # Send OTP to email; a late OTP is useless, so it is dropped if not sent in time
+        outbox.enqueue(
+            'otp',
             'Your TEXVO OTP for Password Reset',
             f'Your OTP for password reset is: {otp}',
-            settings.EMAIL_HOST_USER,
-            [user.email],
-            fail_silently=False,
+            user.email,
+            from_email=settings.EMAIL_HOST_USER,
+            expires_in=settings.OTP_EMAIL_EXPIRY,
         )
         context['otp_sent'] = True
 
@@ -2454,6 +2335,7 @@ def settings_view(request):
     return render(request, 'accounts/settings.html', context)
 
 @login_required
+@reports_view
 def expert_payments(request):
     if request.user.role != 'admin':
         return redirect('accounts:dashboard')
@@ -2467,20 +2349,47 @@ def expert_payments(request):
     # Dictionary to store expert data
     expert_data = {}
     
+    # Past years also read the archive
+    task_models, invoice_models = [Task], [Invoice]
+    if archive.reaches(dates.year_bounds(year)[0]):
+        task_models.append(ArchivedTask)
+        invoice_models.append(ArchivedInvoice)
+    
     # Get all completed tasks with allocation
-    tasks = Task.objects.filter(
-        status='Completed',
-        allocation__isnull=False,
-        allocation__role='expert',
-        deadline__year=year
-    ).annotate(
-        month=ExtractMonth('deadline')
-    ).values(
-        'allocation', 'month'
-    ).annotate(
-        total_words=Sum(F('word_count') + F('additional_words')),
-        task_count=Count('id')
-    ).order_by('allocation', 'month')
+    tasks = []
+    for model in task_models:
+        tasks += model.objects.filter(
+            dates.in_year('deadline', year),
+            status='Completed',
+            allocation__isnull=False,
+            allocation__role='expert',
+        ).annotate(
+            month=ExtractMonth('deadline', tzinfo=dates.business_timezone())
+        ).values(
+            'allocation', 'month'
+        ).annotate(
+            total_words=Sum(F('word_count') + F('additional_words')),
+            task_count=Count('id')
+        ).order_by('allocation', 'month')
+    
+    # Revenue received per month in INR, each payment converted at the rate
+    # in effect on its payment date so past months don't drift
+    revenue_by_month = {}
+    for model in invoice_models:
+        paid_invoices = fx.with_paid_inr_at_payment_date(
+            model.objects.filter(dates.in_year('payment_date', year), amount_paid__gt=0)
+        )
+        for month, total in (
+            paid_invoices.annotate(month=ExtractMonth('payment_date', tzinfo=dates.business_timezone()))
+            .values('month')
+            .annotate(total=Sum('amount_paid_inr'))
+            .values_list('month', 'total')
+        ):
+            revenue_by_month[month] = (revenue_by_month.get(month) or 0) + (total or 0)
+    monthly_revenue = [
+        {'month': month, 'amount_inr': float(revenue_by_month.get(month) or 0)}
+        for month in range(1, 13)
+    ]
     
     # Initialize expert pay rates
     for expert in experts:
@@ -2576,6 +2485,8 @@ def expert_payments(request):
         'available_years': available_years,
         'months': [{'number': m, 'name': calendar.month_name[m]} for m in range(1, 13)],
         'currency_choices': Invoice.CURRENCY_CHOICES,
+        'monthly_revenue': monthly_revenue,
+        'yearly_revenue': sum(month['amount_inr'] for month in monthly_revenue),
     }
     
     return render(request, 'accounts/expert_payments.html', context)
@@ -1,4 +1,6 @@
 from django.db import models
+from accounts import fx
+from accounts.models import InvoiceQuerySet
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -34,6 +36,8 @@ class Invoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvoiceQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
 
@@ -62,55 +66,9 @@ class Invoice(models.Model):
         return symbols.get(self.currency, '₹')
 
     def get_amount_in_inr(self, exchange_rates=None):
-        """Convert amount to INR using live exchange rates"""
-        if self.currency == 'INR':
-            return float(self.amount_due)
-        
-        if not exchange_rates:
-            # Import here to avoid circular imports
-            try:
-                from accounts.views import get_exchange_rates
-                exchange_rates = get_exchange_rates()
-            except:
-                # Fallback rates
-                exchange_rates = {
-                    'USD_TO_INR': 82.0,
-                    'EUR_TO_INR': 88.5,
-                    'GBP_TO_INR': 101.2,
-                }
-        
-        # Convert to INR
-        if self.currency == 'USD':
-            return float(self.amount_due) * exchange_rates.get('USD_TO_INR', 82.0)
-        elif self.currency == 'EUR':
-            return float(self.amount_due) * exchange_rates.get('EUR_TO_INR', 88.5)
-        elif self.currency == 'GBP':
-            return float(self.amount_due) * exchange_rates.get('GBP_TO_INR', 101.2)
-        else:
-            return float(self.amount_due)
+        """Convert amount to INR (cached rates unless exchange_rates is given)"""
+        return fx.convert_to_inr(self.amount_due, self.currency, exchange_rates)
 
     def get_paid_amount_in_inr(self, exchange_rates=None):
-        """Convert paid amount to INR using live exchange rates"""
-        if self.currency == 'INR':
-            return float(self.amount_paid)
-        
-        if not exchange_rates:
-            try:
-                from accounts.views import get_exchange_rates
-                exchange_rates = get_exchange_rates()
-            except:
-                exchange_rates = {
-                    'USD_TO_INR': 82.0,
-                    'EUR_TO_INR': 88.5,
-                    'GBP_TO_INR': 101.2,
-                }
-        
-        # Convert to INR
-        if self.currency == 'USD':
-            return float(self.amount_paid) * exchange_rates.get('USD_TO_INR', 82.0)
-        elif self.currency == 'EUR':
-            return float(self.amount_paid) * exchange_rates.get('EUR_TO_INR', 88.5)
-        elif self.currency == 'GBP':
-            return float(self.amount_paid) * exchange_rates.get('GBP_TO_INR', 101.2)
-        else:
-            return float(self.amount_paid)
\ No newline at end of file
+        """Convert paid amount to INR (cached rates unless exchange_rates is given)"""
+        return fx.convert_to_inr(self.amount_paid, self.currency, exchange_rates)
\ No newline at end of file
@@ -1,6 +1,7 @@
-import os
 from pathlib import Path
 
+from decouple import config
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-change-this-in-production'
@@ -49,11 +50,63 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'texvo.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database: SQLite unless DB_ENGINE=postgresql. Values come from the
+# environment or a .env file next to manage.py (python-decouple).
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+# Seconds a connection is reused across requests; 0 closes it after each one
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='texvo'),
+            'USER': config('DB_USER', default='texvo'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # Ping a reused connection before the request that gets it, so a
+            # server restart costs a reconnect instead of a failed request
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        },
     }
+    # Read replica for the reporting views (accounts/routers.py)
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+    if DB_REPLICA_HOST:
+        DATABASES['reports'] = {
+            **DATABASES['default'],
+            'HOST': DB_REPLICA_HOST,
+            'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+            # Tests read the replica's data from the test default database
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            # Django's SQLite backend plus transaction_mode (accounts/sqlite)
+            'ENGINE': 'accounts.sqlite',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Take the write lock at BEGIN so writers queue on busy_timeout
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['accounts.routers.ReportsRouter']
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers and the writer no longer block each other
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # ms to wait for a lock
+    'synchronous': 'NORMAL',  # safe with WAL; fsync at checkpoints only
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64 * 1024,  # negative means KiB: 64 MB per connection
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -75,6 +128,8 @@ LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
+# Days, weeks and months on dashboards and reports follow this zone
+BUSINESS_TIME_ZONE = config('BUSINESS_TIME_ZONE', default='Asia/Kolkata')
 
 # Create static directory if it doesn't exist
 STATIC_DIR = BASE_DIR / 'static'
@@ -100,13 +155,52 @@ LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=False points at the smtp_sink command
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)  # seconds per SMTP operation
+EMAIL_RATE_LIMIT = config('EMAIL_RATE_LIMIT', default=60, cast=int)  # messages per minute per worker process; 0 for none
 EMAIL_HOST_USER = 'support@texvo.co.in'
 EMAIL_HOST_PASSWORD = 'cgpf hqqm hnhj xzvm'
 DEFAULT_FROM_EMAIL = 'support@texvo.co.in'
 
+# Email outbox, delivered by the run_email_worker command (seconds)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6  # failures before an email is dead-lettered
+EMAIL_OUTBOX_BACKOFF = 30  # wait before the first retry, doubling after each failure
+EMAIL_OUTBOX_BACKOFF_MAX = 60 * 60
+EMAIL_OUTBOX_LEASE = 5 * 60  # how long a worker holds the emails it claimed
+EMAIL_OUTBOX_KEEP_SENT = 7 * 24 * 60 * 60  # sent emails hold reset links and OTPs
+OTP_EMAIL_EXPIRY = 10 * 60  # an OTP email not sent by then is dropped
+
+# Exchange rates (seconds)
+FX_RATE_TTL = 5 * 60  # reuse the loaded rate snapshot without re-reading it
+FX_RATE_STALE_TTL = 24 * 60 * 60  # serve stale rates while refreshing in the background
+FX_RATE_ERROR_TTL = 60  # wait before retrying a failed reload
+FX_RATE_PROVIDER = 'http'  # http, file, stub or a dotted provider class path
+FX_HTTP_TIMEOUT = 3  # per attempt
+FX_HTTP_BUDGET = 8  # total for one fetch, including retries
+FX_HTTP_RETRIES = 2
+FX_BREAKER_FAILURES = 3  # consecutive failures before the circuit opens
+FX_BREAKER_RESET = 60  # seconds before a half-open probe is allowed
+
+# Caches. The dashboard cache is per process (locmem) unless DASHBOARD_CACHE_DIR
+# is set, in which case all worker processes share a file-based cache there.
+DASHBOARD_CACHE_DIR = config('DASHBOARD_CACHE_DIR', default=None)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if DASHBOARD_CACHE_DIR
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': DASHBOARD_CACHE_DIR or 'dashboard',
+        'TIMEOUT': config('DASHBOARD_CACHE_TIMEOUT', default=10 * 60, cast=int),  # seconds
+    },
+}
+
 # CSRF Settings
 CSRF_COOKIE_HTTPONLY = False
 CSRF_USE_SESSIONS = False